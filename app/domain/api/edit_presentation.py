@@ -18,20 +18,21 @@
 """
 
 
-import os
-from pathlib import Path
-from string import Template
 from typing import Union
 
+from app.domain.api.presentation import get_presentation
+from app.domain.api.store_presentation import store_presentation
 from app.domain.model.presentation import Presentation
+from app.features.resources import Resources
+from app.features.storage import PresentationStore
 
 
-async def edit_presentation(path: str, id: Union[str, None] = None) -> str:
+async def edit_presentation(store: PresentationStore, id: Union[str, None] = None) -> str:
     """
     Generates the HTML content for editing a presentation.
 
     Args:
-        path: The directory path where presentation data is stored.
+        store: The store where presentations are kept.
         id: The ID of the presentation to edit. If None, a new presentation is created.
 
     Returns:
@@ -44,36 +45,27 @@ async def edit_presentation(path: str, id: Union[str, None] = None) -> str:
     presentation = None
     if id is None:
         presentation = Presentation()
-        with open(os.path.join(path, f'{presentation.id}.json'), 'w+') as f:
-            f.write(presentation.to_json())
+        await store_presentation(presentation, store)
     else:
-        with open(os.path.join(path, f'{id}.json'), 'r') as f:
-            presentation = Presentation.from_json(f.read())
+        presentation = await get_presentation(id, store)
     if presentation is None:
         raise AssertionError('Presentation not found')
     slides = [f"{{id: '{slide.id}', text: '{slide.title}', order: {slide.position}, icon: 'fa fa-rectangle-list'}}" for slide in presentation.slides]
     first_slide_id = presentation.slides.pop(0).id if presentation.slides else ''
-    templates_path = os.path.join(Path.cwd(), 'res')
-
-    with open(os.path.join(templates_path, 'edit_presentation.css'), 'r') as css_file:
-        css = css_file.read()
+    css = Resources.get('edit_presentation.css')
 
     js_values = {
         'presentation_id': presentation.id,
         'presentation_title': presentation.title,
         'presentation_footer': presentation.footer,
+        'presentation_version': presentation.version,
         'slide_items': ',\n    '.join(slides),
         'first_slide_id': first_slide_id,
     }
-    with open(os.path.join(templates_path, 'edit_presentation.js'), 'r') as js_file:
-        js_template = js_file.read()
-    javascript = Template(js_template).safe_substitute(js_values)
+    javascript = Resources.template('edit_presentation.js').safe_substitute(js_values)
 
     html_values = {
         'css': css,
         'javascript': javascript
     }
-    with open(os.path.join(templates_path, 'edit_presentation.html'), 'r') as html_file:
-        html_template = html_file.read()
-
-    return Template(html_template).safe_substitute(html_values)
+    return Resources.template('edit_presentation.html').safe_substitute(html_values)
@@ -18,55 +18,370 @@
 """
 
 
-import os
+import asyncio
+import hashlib
+import itertools
+import weakref
+from functools import partial
 
-from app.domain.api.store_presentation import store_presentation
+from app.domain.api.store_presentation import store_presentation, load_presentation, presentation_cache, \
+    render_cache
 from app.domain.model.presentation import Presentation
 from app.domain.model.slides import Slide
 from app.domain.model.templates.templates import Templates
 from app.domain.model.transitions.transitions import Transitions
-from typing import Union
+from app.features.resources import Resources
+from app.features.storage import PresentationStore
+from app.utils.compression import compress_all
+from app.utils.config import get_setting
+from app.utils.errors import StreamLagError
+from app.utils.logger import logger
+from typing import AsyncIterator, Optional, Union
 
 
-async def get_presentation(id: str, presentations_dir: str) -> Union[Presentation, None]:
+async def get_presentation(id: str, store: PresentationStore, copy: bool = True) -> Union[Presentation, None]:
     """
-    Retrieves a presentation from its JSON file.
+    Retrieves a presentation from the store, through the presentation cache.
+
+    Args:
+        id: The ID of the presentation.
+        store: The store where presentations are kept.
+        copy: Whether to return an isolated copy. Pass False only if the presentation will not be modified.
+    """
+    return await load_presentation(id, store, copy=copy)
+
+
+class _SharedRender:
+    """
+    A render of the HTML document of a presentation, shared by the requests made while it runs.
+
+    The chunks are kept as they are produced, so every request streams the whole document from the
+    start at its own pace. Once the document grows past the size it could be cached at, no request
+    can join the render anymore and the chunks already streamed to every request are dropped.
+
+    The chunks held never exceed that size: beyond it, the render waits for the slowest requests to
+    read theirs. A request which does not read anything for 'stream_lag_timeout' seconds meanwhile
+    is dropped, so a stalled client cannot hold up the others, and its response is aborted.
+    """
+
+    def __init__(self, version: tuple, max_size: int):
+        self.version = version
+        self.etag: Optional[str] = None
+        self.stats = {'hits': 0, 'misses': 0}
+        self.parts: list[str] = []
+        self.size = 0
+        self.max_size = max_size
+        self.lag_timeout = float(get_setting('stream_lag_timeout', 10.0))
+        self.shared = True
+        self.done = False
+        self.error: Optional[Exception] = None
+        self._changed = asyncio.Condition()
+        self._drained = asyncio.Event()
+        self._start = 0
+        self._held = 0
+        self._positions: dict[int, int] = {}
+        self._dropped: set[int] = set()
+        self._streams = itertools.count()
+
+    @property
+    def _end(self) -> int:
+        """
+        Returns the number of chunks produced so far.
+        """
+        return self._start + len(self.parts)
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _trim(self):
+        """
+        Drops the chunks already streamed to every request, once the render is no longer shared.
+        """
+        if self.shared:
+            return
+        start = min(self._positions.values(), default=self._end)
+        dropped = self.parts[:start - self._start]
+        del self.parts[:start - self._start]
+        self._start = start
+        self._held -= sum([len(part) for part in dropped])
+        self._drained.set()
+
+    def _leave(self, key: int):
+        """
+        Forgets the position of a request which stopped streaming the document.
+        """
+        if self._positions.pop(key, None) is not None:
+            self._trim()
+
+    async def _wait_for_readers(self):
+        """
+        Waits for the requests to read enough chunks for the render to hold no more than its maximum
+        size, dropping the slowest requests if none reads anything in time.
+        """
+        while self._held > self.max_size and self._positions:
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), self.lag_timeout)
+            except TimeoutError:
+                slowest = min(self._positions.values())
+                for key in [key for key, position in self._positions.items() if position == slowest]:
+                    logger.warning('Dropping a request too slow to follow the render of a presentation')
+                    self._dropped.add(key)
+                    self._leave(key)
+                await self._notify()
+
+    async def run(self, chunks: AsyncIterator[str]):
+        """
+        Produces the chunks of the document.
+
+        Args:
+            chunks: The chunks of the document, set the ETag before producing the first one.
+        """
+        try:
+            async for chunk in chunks:
+                self.parts.append(chunk)
+                self.size += len(chunk)
+                self._held += len(chunk)
+                if self.size > self.max_size:
+                    self.shared = False
+                    self._trim()
+                await self._notify()
+                await self._wait_for_readers()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            await self._notify()
+
+    async def started(self) -> bool:
+        """
+        Waits for the first chunk of the document.
+
+        Returns:
+            False if the presentation does not exist.
+
+        Raises:
+            Exception: The error that stopped the render before the first chunk.
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._end or self.done)
+        if not self._end and self.error is not None:
+            raise self.error
+        return self.etag is not None
+
+    def stream(self) -> AsyncIterator[str]:
+        """
+        Returns the chunks of the document from the start, waiting for those not produced yet.
+
+        The request joins the render when this is called, so it must be called while the render
+        is shared.
+        """
+        key = next(self._streams)
+        self._positions[key] = self._start
+        chunks = self._stream(key)
+        weakref.finalize(chunks, self._leave, key)
+        return chunks
+
+    async def _stream(self, key: int) -> AsyncIterator[str]:
+        try:
+            while True:
+                if key in self._dropped:
+                    raise StreamLagError(timeout=self.lag_timeout)
+                if self._positions[key] < self._end:
+                    position = self._positions[key]
+                    chunk = self.parts[position - self._start]
+                    self._positions[key] = position + 1
+                    self._trim()
+                    yield chunk
+                    continue
+                if self.done:
+                    break
+                async with self._changed:
+                    await self._changed.wait_for(
+                        lambda: key in self._dropped or self._positions[key] < self._end or self.done
+                    )
+            if self.error is not None:
+                raise self.error
+        finally:
+            self._leave(key)
+
+
+_renders: dict[str, _SharedRender] = {}
+
+
+async def _render_chunks(
+        id: str,
+        store: PresentationStore,
+        render: _SharedRender,
+        minify: bool
+) -> AsyncIterator[str]:
+    """
+    Loads a presentation and produces the chunks of its HTML document, then caches the document.
+    """
+    presentation = await load_presentation(id, store, copy=False)
+    if presentation is None:
+        return
+    minified = '.min' if minify else ''
+    render.etag = hashlib.sha256(f'{presentation.to_json()}{Resources.version}{minified}'.encode()).hexdigest()
+    async for chunk in presentation.iter_html(stats=render.stats, minify=minify):
+        yield chunk
+    logger.info(f'Rendered presentation {id}: {render.stats["misses"]} slides rendered, {render.stats["hits"]} reused')
+    if render.shared:
+        html = ''.join(render.parts)
+        render_cache.put(id, (render.etag, html, {}), size=render.size, version=render.version)
+        task = asyncio.create_task(_compress_document(id, render.etag, html, render.version))
+        _compressions.add(task)
+        task.add_done_callback(_compressions.discard)
+
+
+_compressions: set[asyncio.Task] = set()
+
+
+async def _compress_document(id: str, etag: str, html: str, version: tuple):
     """
-    if not os.path.exists(os.path.join(presentations_dir, f'{id}.json')):
+    Adds the compressed variants of a rendered document to its render cache entry.
+
+    The document is compressed once per version, at the highest level, away from the event loop.
+    """
+    encoded = await asyncio.to_thread(compress_all, html.encode())
+    if render_cache.get(id, version=version) is not None:
+        size = len(html) + sum([len(data) for data in encoded.values()])
+        render_cache.put(id, (etag, html, encoded), size=size, version=version)
+
+
+def _render_done(id: str, render: _SharedRender, _: asyncio.Task):
+    if _renders.get(id) is render:
+        del _renders[id]
+
+
+async def render_presentation(
+        id: str,
+        store: PresentationStore,
+        minify: bool = False
+) -> Optional[tuple[str, Union[str, AsyncIterator[str]], dict[str, bytes]]]:
+    """
+    Renders the HTML document of a presentation, through the render cache.
+
+    The document is rendered again only when the stored presentation or the resources change, and
+    then only the slides that changed are rendered again. It comes with a strong ETag computed from
+    the content of the presentation and the version of the resources, so it stays the same when an
+    unchanged presentation is reloaded from the store.
+
+    A document that is not in the render cache is returned as an iterator of chunks, to be streamed
+    to the client. Concurrent requests for the same version of a presentation share a single render,
+    whose chunks are streamed to each of them, until the document grows larger than a quarter of
+    the cache: later requests then start their own render. The document is added to the render cache once fully
+    produced, unless it is larger than a quarter of the cache, and its compressed variants are
+    added to the cache entry shortly after. A minified document is cached minified, so it is
+    minified once per version.
+
+    Args:
+        id: The ID of the presentation.
+        store: The store where presentations are kept.
+        minify: Whether to minify the document.
+
+    Returns:
+        The ETag, the HTML document or its chunks, and the compressed variants of the document by
+        content coding, if known, or None if the presentation does not exist.
+    """
+    stat = await store.stat(id)
+    if stat is None:
+        render_cache.invalidate(id)
         return None
-    with open(os.path.join(presentations_dir, f'{id}.json'), 'r') as file:
-        presentation = Presentation.from_json(file.read())
-    return presentation
+    version = (stat.version, Resources.version, minify)
+    rendered = render_cache.get(id, version=version)
+    if rendered is not None:
+        return rendered
+    render = _renders.get(id)
+    if render is None or render.version != version or not render.shared:
+        render = _renders[id] = _SharedRender(version, render_cache.max_size // 4)
+        task = asyncio.create_task(render.run(_render_chunks(id, store, render, minify)))
+        task.add_done_callback(partial(_render_done, id, render))
+    chunks = render.stream()
+    if not await render.started():
+        return None
+    return render.etag, chunks, {}
+
+
+async def export_presentation(id: str, store: PresentationStore, minify: bool = False) -> Optional[str]:
+    """
+    Renders the self-contained HTML document of a presentation, to be opened without the server.
+
+    Each distinct image and video is inlined once in the document. The exported document is not cached, but
+    the fragments of the slides are.
+
+    Args:
+        id: The ID of the presentation.
+        store: The store where presentations are kept.
+        minify: Whether to minify the document.
+
+    Returns:
+        The HTML document, or None if the presentation does not exist.
+    """
+    presentation = await load_presentation(id, store, copy=False)
+    if presentation is None:
+        return None
+    return await presentation.get_html(export=True, minify=minify)
+
+
+async def get_slide(id: str, sid: str, store: PresentationStore) -> tuple[Optional[Slide], Optional[int]]:
+    """
+    Retrieves a single slide of a presentation, with the version of the presentation.
+
+    The slide is taken from the cached presentation when it is up to date. Otherwise only the
+    slide is read from the store if it knows the version of the presentation without loading it,
+    and the whole presentation is loaded into the cache if not.
+
+    Args:
+        id: The ID of the presentation.
+        sid: The ID of the slide.
+        store: The store where presentations are kept.
+
+    Returns:
+        The slide and the version of the presentation, (None, None) if the presentation does not exist.
+    """
+    stat = await store.stat(id)
+    if stat is None:
+        return None, None
+    presentation = presentation_cache.get(id, version=stat.version)
+    if presentation is None and stat.revision is not None:
+        return await store.load_slide(id, sid), stat.revision
+    if presentation is None:
+        presentation = await load_presentation(id, store, copy=False)
+        if presentation is None:
+            return None, None
+    return next((s for s in presentation.slides if s.id == sid), None), presentation.version
 
 
-async def add_slide_to_presentation(presentation: Presentation, position: Union[int, None], presentations_dir: str):
+async def add_slide_to_presentation(presentation: Presentation, position: Union[int, None], store: PresentationStore):
     """
     Adds a new slide to a presentation.
 
     Args:
         presentation: The presentation to add the slide to.
         position: The position to insert the slide at. If None, the slide is added to the end.
-        presentations_dir: The directory where presentations are stored.
+        store: The store where presentations are kept.
 
     """
     if position is None:
         position = len(presentation.slides)
     slide = Slide(template=Templates.default(), transition=Transitions.default(), position=position)
     presentation.add_slide(slide, position=position)
-    return await store_presentation(presentation, presentations_dir)
+    return await store_presentation(presentation, store)
 
 
-async def remove_slide_from_presentation(presentation: Presentation, sid: str, presentations_dir: str):
+async def remove_slide_from_presentation(presentation: Presentation, sid: str, store: PresentationStore):
     """
     Removes a slide from a presentation.
 
     Args:
         presentation: The presentation to remove the slide from.
         sid: The ID of the slide to remove.
-        presentations_dir: The directory where presentations are stored.
+        store: The store where presentations are kept.
 
     Returns:
         The updated presentation.
     """
     presentation.remove_slide(sid)
-    return await store_presentation(presentation, presentations_dir)
+    return await store_presentation(presentation, store)
@@ -17,24 +17,21 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from app.domain.model import Record, PresentationRecords
-from app.domain.model.presentation import Presentation
-from app.utils.files import list_files
+from app.features.storage import PresentationStore
 
 
-async def get_presentations(path: str) -> PresentationRecords:
+async def get_presentations(store: PresentationStore) -> PresentationRecords:
     """
-    Retrieves a list of presentations from a specified directory.
+    Retrieves a list of presentations from the store.
+
+    The list is read from the store metadata (the presentations index for the file store),
+    without loading the presentations themselves.
 
     Args:
-        path: The path to the directory containing presentation files (JSON).
+        store: The store where presentations are kept.
 
     Returns:
         PresentationRecords: A dictionary containing a list of presentation records, each with an 'id' and 'text' (title).
     """
-    records = []
-    files = list_files(path, ['.json'])
-    for file in files:
-        with open(file, 'r') as f:
-            presentation = Presentation.from_json(f.read())
-        records.append(Record(id=presentation.id, text=presentation.title))
-    return PresentationRecords(status='success', total=len(files),records=records)
+    records = [Record(id=entry['id'], text=entry['title']) for entry in await store.list_presentations()]
+    return PresentationRecords(status='success', total=len(records),records=records)
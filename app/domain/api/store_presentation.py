@@ -18,120 +18,186 @@
 """
 
 
-import os
+import asyncio
+from copy import deepcopy
+from typing import Optional, Union
+from weakref import WeakValueDictionary
 
-from app.domain.model.fx import FXResponse
-from app.domain.model.templates.templates import Templates
-from app.domain.model.transitions.transitions import Transitions
+from app.domain.model.file import File
 from app.domain.model.presentation import Presentation
-from app.domain.model.file import Image, Video
+from app.features.storage import PresentationStore
+from app.utils.cache import LRUCache
+from app.utils.compression import etag_matches
+from app.utils.config import get_setting
+from app.utils.errors import VersionConflictError
 
+"""
+Decoded presentations, keyed by id and validated against the version of the stored presentation.
+"""
+presentation_cache = LRUCache(max_size=int(get_setting('presentation_cache_size', 256 * 1024 * 1024)))
+
+"""
+Rendered HTML documents, keyed by presentation id and validated against the version of the stored
+presentation and of the resources.
+"""
+render_cache = LRUCache(max_size=int(get_setting('render_cache_size', 64 * 1024 * 1024)))
+
+"""
+Locks serializing the read-modify-write cycles on each presentation, dropped once unused.
+"""
+_presentation_locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+
+
+def presentation_lock(id: str) -> asyncio.Lock:
+    """
+    Returns the lock serializing the changes made to a presentation.
+
+    Loading, changing and storing a presentation under this lock guarantees that no other request
+    of this process changes it in between.
 
-async def save_presentation_changes(changes: dict, presentations_dir: str) -> Presentation:
+    Args:
+        id: The ID of the presentation.
+
+    Returns:
+        The lock of the presentation.
+    """
+    lock = _presentation_locks.get(id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _presentation_locks[id] = lock
+    return lock
+
+
+def version_etag(version: int) -> str:
+    """
+    Returns the ETag of a presentation version.
+
+    Args:
+        version: The version of the presentation.
+
+    Returns:
+        The quoted ETag.
+    """
+    return f'"{version}"'
+
+
+def version_matches(if_match: Optional[str], version: Optional[int]) -> bool:
+    """
+    Checks an If-Match header against the version of a presentation.
+
+    Args:
+        if_match: The value of the If-Match header, None if the request has none.
+        version: The current version of the presentation, None if it does not exist.
+
+    Returns:
+        True if the header is absent, or if the presentation exists and the header is '*' or lists
+        the ETag of its version, as sent with any content coding, False otherwise.
+    """
+    if if_match is None:
+        return True
+    if version is None:
+        return False
+    return etag_matches(if_match, version_etag(version))
+
+
+async def load_presentation(id: str, store: PresentationStore, copy: bool = True) -> Union[Presentation, None]:
+    """
+    Loads a presentation from the store, going through the presentation cache.
+
+    The cached instance is only reused while the version reported by the store is unchanged
+    (the modification time and size of the file for the file store).
+
+    Args:
+        id: The ID of the presentation.
+        store: The store where presentations are kept.
+        copy: Whether to return an isolated copy of the cached instance. Callers that modify the
+            presentation must keep the default, read-only callers can skip the copy.
+
+    Returns:
+        The Presentation object, or None if it does not exist.
+    """
+    stat = await store.stat(id)
+    if stat is None:
+        presentation_cache.invalidate(id)
+        return None
+    presentation = presentation_cache.get(id, version=stat.version)
+    if presentation is None:
+        presentation = await store.load(id)
+        if presentation is None:
+            return None
+        presentation_cache.put(id, presentation, size=stat.size, version=stat.version)
+    return deepcopy(presentation) if copy else presentation
+
+
+async def save_presentation_changes(changes: dict, store: PresentationStore) -> tuple[Presentation, list[dict]]:
     """
     Saves changes to a presentation.
 
-    This function takes a dictionary of changes and a directory path,
+    This function takes a dictionary of changes and a presentation store,
     loads the existing presentation (or creates a new one), applies the changes,
-    and returns the updated presentation object.
+    and returns the updated presentation object with the changes as applied.
 
     Args:
         changes: A dictionary containing the changes to apply.
-        presentations_dir: The directory where presentations are stored.
+        store: The store where presentations are kept.
 
     Returns:
-        The updated Presentation object.
+        The updated Presentation object, and the changes as applied, to pass to store_presentation.
     """
     pres_id = changes["id"]
-    file_path = os.path.join(presentations_dir, f"{pres_id}.json")
-    presentation = (
-        Presentation.from_json(open(file_path, "r").read())
-        if os.path.exists(file_path)
-        else Presentation()
-    )
-    for change in changes["changes"]:
-        if change["field"] == "title":
-            presentation.title = change["value"]
-        elif change["field"] == "footer":
-            presentation.footer = change["value"]
-        elif change["field"] == "font_family":
-            presentation.font_family = change["value"]
-        elif change["field"] == "slide":
-            slide_id = change["id"]
-            slide = next(s for s in presentation.slides if s.id == slide_id)
-            for field in change["value"]:
-                field_name = field["field"]
-                field_value = field["value"]
-                if field_name == "position":
-                    presentation = presentation.move_slide(slide_id, field_value)
-                elif field_name == "title":
-                    slide.title = field_value
-                elif field_name == "description":
-                    slide.description = field_value
-                elif field_name == "header_font_family":
-                    presentation.header_font_family = field_value["id"]
-                    slide.header_font_family = field_value["id"]
-                elif field_name == "font_family":
-                    presentation.font_family = field_value["id"]
-                    slide.font_family = field_value["id"]
-                elif field_name == "header_alignment":
-                    slide.header_alignment = field_value["id"]
-                elif field_name == "background_color":
-                    slide.background_color = f"#{field_value}" if not field_value.startswith("#") else field_value
-                elif field_name == "background_color_alt":
-                    slide.background_color_alt = f"#{field_value}" if not field_value.startswith("#") else field_value
-                elif field_name == "accent_color":
-                    slide.accent_color = f"#{field_value}" if not field_value.startswith("#") else field_value
-                elif field_name == "background_image":
-                    slide.background_image = field_value
-                elif field_name == "transition":
-                    slide.transition = Transitions(field_value["id"]).new_instance()
-                elif field_name == "duration":
-                    slide.transition.duration = field_value
-                elif field_name == "theme":
-                    slide.theme = field_value
-                elif field_name == "template":
-                    slide.template = Templates(field_value["id"]).new_instance()
-                elif field_name in (f't_{f.name}' for f in slide.template.fields):
-                    field_name = '_'.join(field_name.split('_')[1:])
-                    field_index = [f.name for f in slide.template.fields].index(field_name)
-                    if field_name.endswith("image") and isinstance(field_value, dict):
-                        slide.template.fields[field_index].content = Image(**field_value)
-                    elif field_name.endswith("video") and isinstance(field_value, dict):
-                        slide.template.fields[field_index].content = Video(**field_value)
-                    else:
-                        slide.template.fields[field_index].content = field_value
-                elif field_name in (f'fx_{f.name}' for f in slide.template.fields):
-                    field_name = '_'.join(field_name.split('_')[1:])
-                    field_index = [f.name for f in slide.template.fields].index(field_name)
-                    fx = None
-                    if field_value:
-                        fx = FXResponse.get_fx(field_value)
-                    slide.template.fields[field_index].fx = fx
-                else:
-                    raise ValueError(f'Unknown field: {field_name}')
-            presentation.update_slide(slide)
-        else:
-            raise ValueError(f'Unknown field: {change["field"]}')
-    return presentation
+    presentation = await load_presentation(pres_id, store) or Presentation()
+    return presentation, presentation.apply_changes(changes["changes"])
 
 
-async def store_presentation(presentation: Presentation, presentations_dir: str) -> bool:
+def _recorded_changes(changes: list[dict]) -> list[dict]:
+    """
+    Returns the changes as applied to a presentation, with the media files they hold replaced by
+    their reference to the media store.
     """
-    Stores a presentation as a JSON file in the specified path.
+    return [
+        {**change, 'value': [
+            {**field_change, 'value': field_change['value'].to_dict()}
+            if isinstance(field_change['value'], File) else field_change
+            for field_change in change['value']
+        ]} if change.get('field') == 'slide' else change
+        for change in changes
+    ]
+
+
+async def store_presentation(
+        presentation: Presentation,
+        store: PresentationStore,
+        changes: Optional[list[dict]] = None
+) -> bool:
+    """
+    Stores a presentation in the given store, incrementing its version.
 
     Args:
         presentation: The Presentation object to store.
-        presentations_dir: The directory path where the presentation should be stored.
+        store: The store where presentations are kept.
+        changes: The changes applied to the stored version of the presentation, as returned by
+            Presentation.apply_changes, if known. They let the store record only the changes
+            instead of the whole presentation.
 
     Returns:
         True if the presentation was successfully stored, False otherwise.
 
+    Raises:
+        VersionConflictError: If the store holds a newer version of the presentation.
     """
     try:
-        with open(os.path.join(presentations_dir, f'{presentation.id}.json'), 'w+') as f:
-            f.write(presentation.to_json())
+        presentation.externalize_media()
+        presentation.version += 1
+        if changes is None:
+            await store.save(presentation)
+        else:
+            await store.save_changes(presentation, _recorded_changes(changes))
+        presentation_cache.invalidate(presentation.id)
+        render_cache.invalidate(presentation.id)
         return True
+    except VersionConflictError:
+        presentation_cache.invalidate(presentation.id)
+        raise
     except Exception as e:
         print(e)
         return False
@@ -18,9 +18,26 @@
 """
 
 
+import base64
 from dataclasses import dataclass
+from typing import Optional, Self
+
+from pydantic import BaseModel
 
 from app.domain.model import ModelObject
+from app.features.media import MediaStore
+
+
+class MediaReference(BaseModel):
+    """
+    Represents a reference to a file stored in the media store.
+
+    It can be attached as is to an image or video field of a slide.
+    """
+    type: str
+    name: str
+    size: int
+    hash: str
 
 
 @dataclass
@@ -31,13 +48,55 @@ class File(ModelObject):
     Attributes:
         type (str): The MIME type of the file.
         name (str): The name of the file.
-        content (str): The content of the file, typically base64 encoded.
+        content (str): The content of the file, base64 encoded, or empty when stored in the media store.
         size (int): The size of the file in bytes.
+        hash (Optional[str]): The SHA-256 digest of the file in the media store.
     """
     type: str
     name: str
-    content: str
-    size: int
+    content: str = ""
+    size: int = 0
+    hash: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Returns the URL of the file in the media store, or its data URL if it is not stored.
+
+        Returns:
+            str: The URL of the file.
+        """
+        if self.hash:
+            return f'/media/{self.hash}'
+        return self.data_url
+
+    @property
+    def data_url(self) -> str:
+        """
+        Generates a data URL for the file.
+
+        Returns:
+            str: The data URL.
+        """
+        if self.hash and not self.content:
+            content = base64.b64encode(MediaStore.read(self.hash)).decode('ascii')
+        else:
+            content = self.content
+        return f'data:{self.type};base64,{content}'
+
+    def externalize(self) -> Self:
+        """
+        Moves the base64 content of the file to the media store, keeping only a reference.
+
+        Returns:
+            Self: The updated File object.
+        """
+        if self.content:
+            data = base64.b64decode(self.content)
+            self.hash = MediaStore.put(data, media_type=self.type)
+            self.size = len(data)
+            self.content = ""
+        return self
 
 
 @dataclass
@@ -50,16 +109,7 @@ class Image(File):
     Properties:
         data_url (str): A data URL representation of the image.
     """
-
-    @property
-    def data_url(self) -> str:
-        """
-        Generates a data URL for the image.
-
-        Returns:
-            str: The data URL.
-        """
-        return f'data:{self.type};base64,{self.content}'
+    pass
 
 
 @dataclass
@@ -70,15 +120,6 @@ class Video(File):
     Inherits from File.
 
     Properties:
-        data_url (str): A data URL representation of the image.
+        data_url (str): A data URL representation of the video.
     """
-
-    @property
-    def data_url(self) -> str:
-        """
-        Generates a data URL for the video.
-
-        Returns:
-            str: The data URL.
-        """
-        return f'data:{self.type};base64,{self.content}'
+    pass
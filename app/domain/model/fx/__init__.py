@@ -16,10 +16,8 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-import os
 from dataclasses import dataclass
 from enum import Enum
-from pathlib import Path
 from typing import Union
 
 from app.domain.model import ModelObject, FXRecords, Record
@@ -119,13 +117,6 @@ class ShineFX(FX):
 
 class FXResponse:
 
-    @staticmethod
-    def fx_path() -> str:
-        """
-        Returns the path to the directory containing effects css files.
-        """
-        return os.path.join(Path.cwd(), 'res', 'animations')
-
     @staticmethod
     async def list_fx(target_type: FXTargetType = None) -> FXRecords:
         """
@@ -16,19 +16,29 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-import os
+from copy import deepcopy
 from dataclasses import dataclass, field
-from pathlib import Path
 from string import Template
-from typing import Optional, Self
+from typing import AsyncIterator, Optional, Self
 from uuid import uuid4
+import asyncio
+import base64
 import json
+import re
 
 from pydantic import BaseModel
 
-from app.features.themes import Themes
+from app.features.media import MediaStore
 from app.domain.model import ModelObject
-from app.domain.model.slides import Slide, SlideResponse
+from app.domain.model.file import File, Image, Video
+from app.domain.model.fx import FXResponse
+from app.domain.model.slides import Slide, SlideFragments, SlideResponse
+from app.domain.model.templates.templates import Templates
+from app.domain.model.transitions.transitions import Transitions
+from app.features.bundles import Bundles
+from app.features.rendering import SlideRenderer
+from app.features.resources import Resources
+from app.utils.minifier import minify_html
 
 
 class PresentationId(str):
@@ -38,6 +48,119 @@ class PresentationId(str):
     pass
 
 
+"""
+Matches the placeholder of the slides in the presentation template.
+"""
+SLIDES_PLACEHOLDER = re.compile(r'\$(?:slides\b|\{slides\})')
+
+"""
+Matches the placeholder of the shared scripts in the presentation template, before which the
+inlined videos are written.
+"""
+SCRIPTS_PLACEHOLDER = re.compile(r'\$(?:scripts\b|\{scripts\})')
+
+"""
+The number of bytes of an inlined video read and written at once, a multiple of 3 so that the
+base64 encoded blocks can be joined.
+"""
+VIDEO_BLOCK_SIZE = 192 * 1024
+
+"""
+Matches the references to the media store in the style and in the HTML of the slides.
+"""
+MEDIA_URL = re.compile(r'url\(/media/([0-9a-f]+)\)')
+MEDIA_SRC = re.compile(r'src="/media/([0-9a-f]+)"')
+
+"""
+The code highlighting style sheet, only loaded by the presentations showing code.
+"""
+CODE_STYLE = 'presentation_code.css'
+
+"""
+The characters ending a line for str.splitlines.
+"""
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+
+async def _strip_blank_lines(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Removes the blank lines, and the leading and trailing whitespaces, of a document produced in chunks.
+
+    The output is the same as joining the lines of the stripped document that are not blank, but
+    only the current line is held in memory.
+
+    Args:
+        chunks (AsyncIterator[str]): The chunks of the document.
+
+    Returns:
+        AsyncIterator[str]: The chunks of the stripped document.
+    """
+    pending = ''
+    previous = None
+    async for chunk in chunks:
+        lines = (pending + chunk).splitlines(True)
+        pending = ''
+        if lines and (lines[-1][-1] not in LINE_BREAKS or lines[-1][-1] == '\r'):
+            pending = lines.pop()
+        output = []
+        for line in lines:
+            if line.strip():
+                if previous is None:
+                    line = line.lstrip()
+                else:
+                    output.append(previous)
+                previous = line
+        if output:
+            yield ''.join(output)
+    if pending.strip():
+        if previous is not None:
+            yield previous
+        previous = pending.lstrip() if previous is None else pending
+    if previous is not None:
+        yield previous.rstrip()
+
+
+async def _minify_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Minifies the chunks of an HTML document one by one.
+
+    Each chunk of a rendered document holds whole elements, so it is minified on its own.
+
+    Args:
+        chunks (AsyncIterator[str]): The chunks of the document.
+
+    Returns:
+        AsyncIterator[str]: The chunks of the minified document.
+    """
+    async for chunk in chunks:
+        yield minify_html(chunk)
+
+
+def _to_file(cls: type[File], change: dict) -> File:
+    """
+    Builds a media file from a field change.
+
+    The value of the change is replaced by the File object, so the change can be recorded with a
+    reference to the media store once store_presentation has moved any inlined content there.
+
+    Args:
+        cls: The File subclass to build (Image or Video).
+        change: The field change, whose value is either a media reference returned by the upload
+            endpoint or a base64 encoded file.
+
+    Returns:
+        The File object.
+
+    Raises:
+        ValueError: If the referenced blob does not exist.
+    """
+    file = cls(**change["value"])
+    if not file.content and not MediaStore.exists(file.hash):
+        raise ValueError(f'Unknown media: {file.hash}')
+    change["value"] = file
+    return file
+
+
 class PresentationResponse(BaseModel):
     id: str
     title: str
@@ -47,6 +170,7 @@ class PresentationResponse(BaseModel):
     style: list[str] = field(default_factory=list)
     scripts: list[str] = field(default_factory=list)
     slides: list[SlideResponse] = field(default_factory=list)
+    version: int = 0
 
 
 @dataclass
@@ -61,6 +185,7 @@ class Presentation(ModelObject):
         font_family (str): The font family used in the presentation.
         style (list[str]): A list of CSS styles for the presentation.
         scripts (list[str]): A list of JavaScript scripts for the presentation.
+        version (int): The number of times the presentation has been stored.
     """
     id: Optional[PresentationId] = field(
         default_factory=lambda: PresentationId(str(uuid4())))
@@ -70,10 +195,10 @@ class Presentation(ModelObject):
     font_family: str = "Roboto"
     style: list[str] = field(default_factory=list)
     scripts: list[str] = field(default_factory=list)
+    version: int = 0
 
     def __post_init__(self):
         self._slides: list[Slide] = list()
-        self._templates_path = os.path.join(Path.cwd(), 'res')
 
     @property
     def slides(self) -> list[Slide]:
@@ -145,6 +270,106 @@ class Presentation(ModelObject):
         if len(self._slides) > slide.position:
             self._slides[slide.position] = slide
 
+    def apply_changes(self, changes: list[dict]) -> list[dict]:
+        """
+        Applies a list of field changes, as sent by the editor, to the presentation.
+
+        The changes are left as is: the ones returned are a copy, to record in their place. The ID
+        of each template and transition instance created is recorded in its change, as
+        'instance_id', and reused when the change already has one, so replaying recorded changes
+        always gives the same presentation. The value of each media change is the File object of
+        the presentation.
+
+        Args:
+            changes (list[dict]): The changes to apply.
+
+        Returns:
+            list[dict]: The changes as applied.
+
+        Raises:
+            ValueError: If a change targets an unknown field or media file.
+        """
+        changes = deepcopy(changes)
+        for change in changes:
+            if change["field"] == "title":
+                self.title = change["value"]
+            elif change["field"] == "footer":
+                self.footer = change["value"]
+            elif change["field"] == "font_family":
+                self.font_family = change["value"]
+            elif change["field"] == "slide":
+                slide_id = change["id"]
+                slide = next(s for s in self.slides if s.id == slide_id)
+                for field_change in change["value"]:
+                    field_name = field_change["field"]
+                    field_value = field_change["value"]
+                    if field_name == "position":
+                        self.move_slide(slide_id, field_value)
+                    elif field_name == "title":
+                        slide.title = field_value
+                    elif field_name == "description":
+                        slide.description = field_value
+                    elif field_name == "header_font_family":
+                        self.header_font_family = field_value["id"]
+                        slide.header_font_family = field_value["id"]
+                    elif field_name == "font_family":
+                        self.font_family = field_value["id"]
+                        slide.font_family = field_value["id"]
+                    elif field_name == "header_alignment":
+                        slide.header_alignment = field_value["id"]
+                    elif field_name == "background_color":
+                        slide.background_color = f"#{field_value}" if not field_value.startswith("#") else field_value
+                    elif field_name == "background_color_alt":
+                        slide.background_color_alt = f"#{field_value}" if not field_value.startswith("#") else field_value
+                    elif field_name == "accent_color":
+                        slide.accent_color = f"#{field_value}" if not field_value.startswith("#") else field_value
+                    elif field_name == "background_image":
+                        slide.background_image = _to_file(Image, field_change) if isinstance(field_value, dict) else None
+                    elif field_name == "transition":
+                        slide.transition = Transitions(field_value["id"]).new_instance()
+                        slide.transition.id = field_value.setdefault("instance_id", slide.transition.id)
+                    elif field_name == "duration":
+                        slide.transition.duration = field_value
+                    elif field_name == "theme":
+                        slide.theme = field_value
+                    elif field_name == "template":
+                        slide.template = Templates(field_value["id"]).new_instance()
+                        slide.template.id = field_value.setdefault("instance_id", slide.template.id)
+                    elif field_name in (f't_{f.name}' for f in slide.template.fields):
+                        field_name = '_'.join(field_name.split('_')[1:])
+                        field_index = [f.name for f in slide.template.fields].index(field_name)
+                        if field_name.endswith("image") and isinstance(field_value, dict):
+                            slide.template.fields[field_index].content = _to_file(Image, field_change)
+                        elif field_name.endswith("video") and isinstance(field_value, dict):
+                            slide.template.fields[field_index].content = _to_file(Video, field_change)
+                        else:
+                            slide.template.fields[field_index].content = field_value
+                    elif field_name in (f'fx_{f.name}' for f in slide.template.fields):
+                        field_name = '_'.join(field_name.split('_')[1:])
+                        field_index = [f.name for f in slide.template.fields].index(field_name)
+                        fx = None
+                        if field_value:
+                            fx = FXResponse.get_fx(field_value)
+                        slide.template.fields[field_index].fx = fx
+                    else:
+                        raise ValueError(f'Unknown field: {field_name}')
+                self.update_slide(slide)
+            else:
+                raise ValueError(f'Unknown field: {change["field"]}')
+        return changes
+
+    def externalize_media(self) -> Self:
+        """
+        Moves any inlined media content of the slides to the media store.
+
+        Returns:
+            Self: The updated Presentation object.
+        """
+        for slide in self._slides:
+            for file in slide.media:
+                file.externalize()
+        return self
+
     def to_dict(self, encode_json=False):
         """
         Converts the presentation object to a dictionary.
@@ -171,10 +396,14 @@ class Presentation(ModelObject):
         o = json.loads(s)
         return cls.from_dict(o, infer_missing=infer_missing)
 
-    def _load_scripts(self) -> str:
+    def _load_scripts(self, slides_scripts: list[str], inline: bool = True) -> str:
         """
         Loads and formats the JavaScript scripts for the presentation.
 
+        Args:
+            slides_scripts (list[str]): The scripts of the rendered slides.
+            inline (bool): Whether to include the script shared by all presentations (default: True).
+
         Returns:
             str: The formatted JavaScript code.
         """
@@ -182,54 +411,105 @@ class Presentation(ModelObject):
         js_values = {
             'total_pages_count': len(self._slides),
             'scripts': ''.join(self.scripts),
-            'slides_scripts': ''.join([slide.get_script() for slide in self.slides])
+            'slides_scripts': ''.join(slides_scripts)
         }
-        with open(os.path.join(self._templates_path, 'presentation.js'), 'r') as js_file:
-            js_template = js_file.read()
-        return Template(js_template).safe_substitute(js_values)
+        script = Resources.template('presentation_slides.js').safe_substitute(js_values)
+        return Resources.get('presentation.js') + script if inline else script
 
-    async def _load_style(self) -> str:
+    async def _load_style(self, inline: bool = True) -> str:
         """
         Loads and formats the CSS styles for the presentation.
 
+        The styles of the slides are not included: each comes with its slide. The transitions are
+        compiled in a thread, as Sass compilation would otherwise block the event loop.
+
+        Args:
+            inline (bool): Whether to include the styles shared by all presentations and the themes
+                (default: True).
+
         Returns:
             str: The formatted CSS code.
         """
         #load css template
+        transitions = {slide.transition.css_class: slide.transition for slide in self._slides}
+        templates = {slide.template.name: slide.template for slide in self._slides}
+        transitions_style = await asyncio.to_thread(
+            lambda: ''.join([transition.get() for transition in transitions.values()])
+        )
         css_values = {
             'style': ''.join(self.style),
-            'slides_style': Template(''.join([slide.get_style() for slide in self._slides])).safe_substitute(
-                {
-                    'header_font_family': self.header_font_family,
-                    'font_family': self.font_family
-                }
-            ),
+            'transitions_style': transitions_style,
+            'templates_style': ''.join([template.shared_style for template in templates.values()]),
             'header_font_family': self.header_font_family,
             'font_family': self.font_family
         }
-        with open(os.path.join(self._templates_path, 'presentation.css'), 'r') as css_file:
-            css_template = css_file.read()
-        with open(os.path.join(self._templates_path, 'animations', 'rainbow.css'), 'r') as animations_file:
-            animation_css = animations_file.read()
-        with open(os.path.join(self._templates_path, 'animations', 'shine.css'), 'r') as animations_file:
-            animation_css += animations_file.read()
-        css_template += animation_css
-        themes = {slide.theme for slide in self._slides if slide.theme}
-        for theme in themes:
-            css_template += await Themes.get_theme(theme)
-        return Template(css_template).safe_substitute(css_values)
+        style = Resources.template('presentation_slides.css').safe_substitute(css_values)
+        if not inline:
+            return style
+        css = Resources.get('presentation.css') + style
+        for name in self._late_styles():
+            css += Resources.get(name)
+        return css
+
+    def _slide_style(self, fragment: SlideFragments) -> str:
+        """
+        Returns the style of a rendered slide, filled with the fonts of the presentation.
 
-    @property
-    def __html_template__(self) -> str:
+        Args:
+            fragment (SlideFragments): The rendered fragments of the slide.
+
+        Returns:
+            str: The CSS code of the slide.
         """
-        Loads the HTML template for the presentation.
+        return Template(fragment.style).safe_substitute({
+            'header_font_family': self.header_font_family,
+            'font_family': self.font_family
+        })
+
+    def _late_styles(self) -> list[str]:
+        """
+        Returns the names of the style sheets used by the slides, loaded after the styles of the presentation.
+
+        Only the animations and the themes actually used by the slides are listed. The code
+        highlighting style sheet is loaded with the first slide showing code, see _code_style.
 
         Returns:
-            str: The HTML template.
+            list[str]: The names of the style sheets in the resources.
         """
-        with open(os.path.join(self._templates_path, 'presentation.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return html_template
+        names = sorted({name for slide in self._slides for name in slide.animations})
+        names += sorted({f'themes/{slide.theme}.css' for slide in self._slides if slide.theme})
+        return names
+
+    @staticmethod
+    def _code_style(inline: bool = True) -> str:
+        """
+        Returns the code highlighting style sheet, to load before the first slide showing code.
+
+        Args:
+            inline (bool): Whether to include the style sheet instead of linking its bundle (default: True).
+
+        Returns:
+            str: The style element or the link to the style sheet.
+        """
+        if inline:
+            return f'<style>\n{Resources.get(CODE_STYLE)}\n</style>\n'
+        return f'<link rel="stylesheet" href="{Bundles.url(CODE_STYLE)}">\n'
+
+    def _load_links(self) -> tuple[str, str, str]:
+        """
+        Returns the links to the bundles of the styles and of the script shared by all presentations.
+
+        Returns:
+            tuple[str, str, str]: The stylesheets to load before the styles of the presentation, those
+                to load after them (the animations and the themes used by the slides), and the script
+                to load before the script of the presentation.
+        """
+        link = '<link rel="stylesheet" href="{}">'
+        return (
+            link.format(Bundles.url('presentation.css')),
+            '\n'.join([link.format(Bundles.url(bundle)) for bundle in self._late_styles()]),
+            f'<script src="{Bundles.url("presentation.js")}"></script>'
+        )
 
     def get_footer(self) -> str:
         """
@@ -243,32 +523,194 @@ class Presentation(ModelObject):
             'footer': self.footer,
             'total_pages_count': len(self._slides)
         }
-        with open(os.path.join(self._templates_path, 'presentation_footer.html'), 'r') as footer_file:
-            footer_template = footer_file.read()
-        return Template(footer_template).safe_substitute(footer_values)
+        return Resources.template('presentation_footer.html').safe_substitute(footer_values)
+
+    def _shared_media(self) -> dict[str, File]:
+        """
+        Returns the media files used by the slides, to inline once each.
+
+        Each image becomes a CSS custom property of the document, used by the styles of the slides
+        through var() and by the images of the slides through a script setting their source, see
+        _media_style. The videos are only used by the video elements of the slides, so they are
+        inlined in that script instead, see _iter_videos and _media_script.
+
+        Returns:
+            dict[str, File]: The images and the videos by hash.
+        """
+        return {file.hash: file for slide in self._slides for file in slide.media if isinstance(file, (Image, Video)) and file.hash}
+
+    @staticmethod
+    async def _media_style(media: dict[str, File]) -> str:
+        """
+        Returns the style defining the inlined images, read from the media store in a thread.
+
+        Args:
+            media (dict[str, File]): The inlined images and videos, by hash.
+
+        Returns:
+            str: The CSS code.
+        """
+        images = {digest: file for digest, file in media.items() if isinstance(file, Image)}
+        if not images:
+            return ''
+        properties = await asyncio.to_thread(
+            lambda: ''.join([f'--media-{digest}: url("{image.data_url}");' for digest, image in images.items()])
+        )
+        return f':root {{{properties}}}\n'
+
+    @staticmethod
+    def _share_media(fragment: SlideFragments, media: dict[str, File]) -> SlideFragments:
+        """
+        Makes a slide reference the inlined copy of each image and video it uses.
 
-    async def get_html(self) -> str:
+        Args:
+            fragment (SlideFragments): The rendered fragments of the slide.
+            media (dict[str, File]): The inlined images and videos, by hash.
+
+        Returns:
+            SlideFragments: The updated fragments.
+        """
+        def css(match: re.Match) -> str:
+            return f'var(--media-{match[1]})' if isinstance(media.get(match[1]), Image) else match[0]
+
+        def src(match: re.Match) -> str:
+            return f'src="" data-media="{match[1]}"' if match[1] in media else match[0]
+
+        return SlideFragments(html=MEDIA_SRC.sub(src, fragment.html), style=MEDIA_URL.sub(css, fragment.style), script=fragment.script)
+
+    @staticmethod
+    async def _iter_videos(media: dict[str, File]) -> AsyncIterator[str]:
+        """
+        Generates the script elements gathering the data URLs of the inlined videos.
+
+        The videos are read from the media store in a thread and written by blocks of
+        VIDEO_BLOCK_SIZE bytes, each in its own script element, so a video is never held whole in
+        memory.
+
+        Args:
+            media (dict[str, File]): The inlined images and videos, by hash.
+
+        Returns:
+            AsyncIterator[str]: The script elements.
+        """
+        yield '<script>const videoParts = {};</script>\n'
+        for digest, file in media.items():
+            if not isinstance(file, Video):
+                continue
+            # the script is inlined in the document, it must not close its script element
+            prefix = json.dumps(f'data:{file.type};base64,').replace('</', '<\\/')
+            yield f'<script>videoParts["{digest}"] = [{prefix}];</script>\n'
+            if file.content:
+                yield f'<script>videoParts["{digest}"].push("{file.content}");</script>\n'
+                continue
+            async for block in MediaStore.iter_read(digest, VIDEO_BLOCK_SIZE):
+                content = base64.b64encode(block).decode('ascii')
+                yield f'<script>videoParts["{digest}"].push("{content}");</script>\n'
+
+    @staticmethod
+    def _media_script() -> str:
+        """
+        Returns the script setting the source of the images and videos inlined in the document.
+
+        Returns:
+            str: The JavaScript code.
+        """
+        return Resources.get('presentation_media.js')
+
+    async def get_html(self, stats: Optional[dict] = None, export: bool = False, minify: bool = False) -> str:
         """
         Generates the complete HTML for the presentation.
 
+        Args:
+            stats (Optional[dict]): A dictionary receiving the 'hits' and 'misses' of the fragment cache.
+            export (bool): Whether to produce a self-contained document (default: False).
+            minify (bool): Whether to minify the document (default: False).
+
         Returns:
             str: The complete HTML code for the presentation.
         """
+        return ''.join([chunk async for chunk in self.iter_html(stats=stats, export=export, minify=minify)])
+
+    async def iter_html(
+            self,
+            stats: Optional[dict] = None,
+            export: bool = False,
+            minify: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Generates the complete HTML for the presentation, chunk by chunk.
+
+        The head and the styles shared by the slides come first, before any slide is rendered, then
+        the slides one by one, each with its own style, then the rest of the document. The slides
+        are rendered by batches while the document is produced, and blank lines are removed on the
+        way, so neither the document nor the fragments of all the slides are held in memory. The
+        fragments are taken from the fragment cache, so only the slides that changed since the last
+        render are rendered again.
+
+        Images are referenced by their URL in the media store, and the styles and script shared by
+        all presentations by the URL of their bundles, unless the document is exported. An exported
+        document inlines them, each distinct image and video once whatever the number of slides
+        using it, so it can be opened without the server.
+
+        A minified document has its comments and extra whitespace removed, including in its styles
+        and script.
+
+        Args:
+            stats (Optional[dict]): A dictionary receiving the 'hits' and 'misses' of the fragment cache.
+            export (bool): Whether to produce a self-contained document (default: False).
+            minify (bool): Whether to minify the document (default: False).
+
+        Returns:
+            AsyncIterator[str]: The chunks of the HTML code for the presentation.
+        """
+        chunks = self._iter_html(stats, export)
+        if minify:
+            chunks = _minify_chunks(chunks)
+        async for chunk in _strip_blank_lines(chunks):
+            yield chunk
+
+    async def _iter_html(self, stats: Optional[dict], export: bool) -> AsyncIterator[str]:
         #load all templates and generate html
         slide_fonts = [[slide.font_family, slide.header_font_family] for slide in self._slides]
         font_families = {font.replace(' ', '+') for fonts in slide_fonts for font in fonts}
         font_link_template = '<link href="https://fonts.googleapis.com/css2?family=$font_family:wght@300;400;700;900&display=swap" rel="stylesheet">'
         font_links = '\n'.join([Template(font_link_template).safe_substitute({'font_family': font}) for font in font_families])
-        style = await self._load_style()
-        html = Template(self.__html_template__).safe_substitute({
-            'style': style,
-            'script': self._load_scripts(),
-            'slides': ''.join([slide.get_html() for slide in self._slides]),
+        media = self._shared_media() if export else {}
+        if not export:
+            await Bundles.build()
+        stylesheets, late_stylesheets, scripts = ('', '', '') if export else self._load_links()
+        values = {
+            'stylesheets': stylesheets,
+            'late_stylesheets': late_stylesheets,
+            'scripts': scripts,
+            'style': await self._media_style(media) + await self._load_style(inline=export),
             'title': self.title,
             'font_links': font_links,
             'footer': self.get_footer()
-        })
-        return "".join([s for s in html.strip().splitlines(True) if s.strip()])
+        }
+        head, tail = SLIDES_PLACEHOLDER.split(Resources.get('presentation.html'), maxsplit=1)
+        fragments = SlideRenderer.iter_render(self._slides, stats=stats)
+        # the head only depends on the presentation, it is sent before the slides are rendered
+        yield Template(head).safe_substitute(values)
+        slides_scripts, code_style = [], False
+        async for fragment in fragments:
+            if media:
+                fragment = self._share_media(fragment, media)
+            if not code_style and 'codehilite' in fragment.html:
+                code_style = True
+                yield self._code_style(inline=export)
+            slides_scripts.append(fragment.script)
+            yield f'<style>\n{self._slide_style(fragment)}\n</style>\n{fragment.html}\n'
+        if media:
+            # the videos are written between the footer and the scripts, outside the slides
+            tail, scripts = SCRIPTS_PLACEHOLDER.split(tail, maxsplit=1)
+            yield Template(tail).safe_substitute(values)
+            async for chunk in self._iter_videos(media):
+                yield chunk
+            tail = '$scripts' + scripts
+        media_script = self._media_script() if media else ''
+        values['script'] = self._load_scripts(slides_scripts, inline=export) + media_script
+        yield Template(tail).safe_substitute(values)
 
     def to_response(self) -> PresentationResponse:
         return PresentationResponse(
@@ -279,5 +721,6 @@ class Presentation(ModelObject):
             font_family=self.font_family,
             style=self.style,
             scripts=self.scripts,
-            slides=[slide.to_response() for slide in self._slides]
+            slides=[slide.to_response() for slide in self._slides],
+            version=self.version
         )
@@ -18,9 +18,8 @@
 """
 
 
-import os
+import hashlib
 from dataclasses import dataclass, field
-from pathlib import Path
 from string import Template
 from typing import Optional
 from uuid import uuid4
@@ -29,9 +28,17 @@ from pydantic import BaseModel
 
 from app.domain.model.templates.templates import Templates
 from app.domain.model import ModelObject
-from app.domain.model.file import Image, Video
+from app.domain.model.file import File, Image, Video
 from app.domain.model.templates import SlideTemplate, SlideTemplateResponse, TemplateFieldType
 from app.domain.model.transitions import Transition, TransitionResponse
+from app.features.resources import Resources
+from app.utils.cache import LRUCache
+from app.utils.config import get_setting
+
+"""
+Rendered slide fragments, keyed by slide fingerprint.
+"""
+fragment_cache = LRUCache(max_size=int(get_setting('fragment_cache_size', 64 * 1024 * 1024)))
 
 
 class SlideId(str):
@@ -61,6 +68,28 @@ class SlideResponse(BaseModel):
     position: int = 0
 
 
+@dataclass(frozen=True)
+class SlideFragments:
+    """
+    Represents the rendered fragments of a slide.
+
+    Attributes:
+        html (str): The HTML of the slide.
+        style (str): The CSS style of the slide.
+        script (str): The JavaScript script of the slide.
+    """
+    html: str
+    style: str
+    script: str
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the total length of the fragments.
+        """
+        return len(self.html) + len(self.style) + len(self.script)
+
+
 @dataclass
 class Slide(ModelObject):
     """
@@ -88,24 +117,6 @@ class Slide(ModelObject):
         default_factory=lambda: SlideId(str(uuid4())))
     position: int = 0
 
-    @property
-    def templates_path(self) -> str:
-        """
-        Returns the path to the directory containing slide templates.
-        """
-        return os.path.join(Path.cwd(), 'res', 'slides')
-
-    @property
-    def __html_template__(self) -> str:
-        """
-        Reads and returns the base HTML template for a slide.
-        """
-        with open(
-            os.path.join(self.templates_path, 'base_slide.html'), 'r'
-        ) as html_file:
-            html_template = html_file.read()
-        return html_template
-
     def get_html(self, hidden: bool = True) -> str:
         """
         Generates the HTML representation of the slide.
@@ -127,7 +138,7 @@ class Slide(ModelObject):
         if not values.get('title'):
             values['title'] = self.title
         values['header_alignment'] = self.header_alignment
-        class_list = [self.template.name.lower().replace(' ', '_')]
+        class_list = [self.template.name.lower().replace(' ', '_'), self.transition.css_class]
         if self.theme:
             class_list.append(self.theme)
         if self.position != 0 and hidden:
@@ -135,13 +146,60 @@ class Slide(ModelObject):
         else:
             class_list.append('current')
         content = Template(self.template.content).safe_substitute(values)
-        return Template(self.__html_template__).safe_substitute({
+        return Resources.template('slides/base_slide.html').safe_substitute({
             'slide_position': self.position,
             'slide_content': content,
             'header_alignment': self.header_alignment,
             'class_list': ' '.join(class_list)
         })
 
+    @property
+    def media(self) -> list[File]:
+        """
+        Returns the media files used by the slide (background image and template fields).
+        """
+        files = [self.background_image] if isinstance(self.background_image, File) else []
+        files.extend(field.content for field in self.template.fields if isinstance(field.content, File))
+        return files
+
+    @property
+    def animations(self) -> set[str]:
+        """
+        Returns the names of the animation style sheets used by the effects of the slide fields.
+        """
+        fx_ids = [field.fx['id'] for field in self.template.fields if field.fx]
+        return {f'animations/{fx_id.split("-")[0]}.css' for fx_id in fx_ids}
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Returns a digest of the slide data and of the resources it is rendered with.
+
+        Two slides with the same fingerprint render the same fragments.
+        """
+        return hashlib.sha256(f'{self.to_json()}{Resources.version}'.encode()).hexdigest()
+
+    def fragment_key(self, hidden: bool = True) -> str:
+        """
+        Returns the key of the fragments of the slide in the fragment cache.
+
+        Args:
+            hidden (bool): Whether the slide should be initially hidden (default: True).
+        """
+        return f'{self.fingerprint}:{hidden}'
+
+    def render_fragments(self, hidden: bool = True) -> SlideFragments:
+        """
+        Renders the HTML, style and script of the slide, bypassing the fragment cache.
+
+        Args:
+            hidden (bool): Whether the slide should be initially hidden (default: True).
+
+        Returns:
+            SlideFragments: The fragments of the slide.
+        """
+        return SlideFragments(html=self.get_html(hidden=hidden), style=self.get_style(), script=self.get_script())
+
     def get_script(self) -> str:
         """
         Returns the JavaScript script associated with the slide's template.
@@ -163,7 +221,7 @@ class Slide(ModelObject):
         values = {
             'background_color': self.background_color,
             'background_color_alt': self.background_color_alt,
-            'background_image': self.background_image.data_url if self.background_image else '',
+            'background_image': self.background_image.url if self.background_image else '',
             'title_text_color': templates_values['title_text_color'] if 'title_text_color' in templates_values else '#000000',
             'text_color': templates_values['text_color'] if 'text_color' in templates_values else '#000000',
             'accent_color': self.accent_color,
@@ -171,16 +229,10 @@ class Slide(ModelObject):
             'font_family': self.font_family,
             'header_alignment': self.header_alignment,
             'slide_position': self.position,
-            'transition': self.transition.get(self.position),
             'template': Template(self.template.style).safe_substitute(templates_values),
             'z_index': 500 - self.position,
         }
-        with open(
-            os.path.join(self.templates_path, 'base_slide.css'), 'r'
-        ) as css_file:
-            css_template = css_file.read()
-        style = Template(css_template).safe_substitute(values)
-        return style
+        return Resources.template('slides/base_slide.css').safe_substitute(values)
 
     @classmethod
     def from_dict(cls, d: dict, infer_missing=False):
@@ -213,6 +265,8 @@ class Slide(ModelObject):
                     f[name] = None
             else:
                 f[name] = field.get('content')
+        if d.get('template').get('id'):
+            f['id'] = d.get('template').get('id')
         t = Templates(t_name).new_instance(**f)
         for field in fields:
             fx = field.get('fx')
@@ -18,19 +18,17 @@
 """
 
 
-import os.path
 from dataclasses import dataclass, field
 from enum import Enum
-from pathlib import Path
 from typing import Optional, Union
 from uuid import uuid4
 
-from markdown import markdown
 from pydantic import BaseModel
 
 from app.domain.model.file import Image, Video
 from app.domain.model import ModelObject
 from app.domain.model.fx import FXItem
+from app.utils.markdown_renderer import render_markdown
 
 
 class TemplateFieldType(str, Enum):
@@ -84,20 +82,23 @@ class TemplateField(ModelObject):
             str: The HTML representation of the content.
                  - If content is None, returns an empty string.
                  - If type is MARKDOWN, returns the content rendered as HTML using markdown.
-                 - If type is IMAGE or VIDEO, returns the data URL of the image or video.
+                 - If type is IMAGE, returns the URL of the image in the media store, so it is
+                   downloaded once by the browser instead of being inlined in every slide using it.
+                 - If type is VIDEO, returns the URL of the video in the media store, so it can be
+                   streamed with range requests instead of being inlined in the document.
                  - Otherwise, returns the content as is.
 
         """
         if self.content is None:
             return ''
         if self.type is TemplateFieldType.MARKDOWN:
-            return markdown(self.content, extensions=['tables', 'extra', 'fenced_code', 'codehilite', 'nl2br', 'sane_lists'])
+            return render_markdown(self.content)
         if self.type is TemplateFieldType.IMAGE:
             if not isinstance(self.content, str):
-                return self.content.data_url
+                return self.content.url
         if self.type is TemplateFieldType.VIDEO:
             if not isinstance(self.content, str):
-                return self.content.data_url
+                return self.content.url
         return self.content
 
     def to_response(self) -> TemplateFieldResponse:
@@ -127,9 +128,9 @@ class SlideTemplate(ModelObject):
         description (str): A description of the template.
         fields (list[TemplateField]): A list of fields in the template.
     Properties:
-        templates_path (str): The path where template files are stored.
         content (str): The content of the template.
-        style (str): The style of the template.
+        style (str): The style of the template specific to a slide, filled with the slide values.
+        shared_style (str): The style of the template shared by all the slides using it.
         script (str): The script associated with the template.
     """
     id: Optional[TemplateId] = field(
@@ -140,10 +141,6 @@ class SlideTemplate(ModelObject):
     text_color: str = "#000000"
     fields: list[TemplateField] = field(default_factory=list)
 
-    @property
-    def templates_path(self) -> str:
-        return os.path.join(Path.cwd(), 'res', 'slides')
-
     @property
     def content(self) -> str:
         return ""
@@ -152,6 +149,10 @@ class SlideTemplate(ModelObject):
     def style(self) -> str:
         return ""
 
+    @property
+    def shared_style(self) -> str:
+        return ""
+
     @property
     def script(self) -> str:
         return ""
@@ -18,12 +18,11 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 from typing import Optional
 
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -47,17 +46,13 @@ class Iframe(SlideTemplate):
         ]
 
     @property
-    def style(self) -> str:
+    def shared_style(self) -> str:
         """
-        Generates the CSS style for the iframe slide.
+        Generates the CSS style shared by all the iframe slides.
+
         :return: The CSS style as a string.
         """
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'iframe.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/iframe.css')
 
     @property
     def script(self) -> str:
@@ -77,6 +72,4 @@ class Iframe(SlideTemplate):
             'id': self.id,
             'if_src': self.src if self.src else '',
         }
-        with open(os.path.join(self.templates_path, 'iframe.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/iframe.html').safe_substitute(html_values)
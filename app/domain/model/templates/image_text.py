@@ -18,13 +18,12 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 from typing import Optional
 
 from app.domain.model.file import Image
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -64,7 +63,7 @@ class ImageText(SlideTemplate):
         """
         Generates the HTML content for the image text slide.
 
-        Reads the HTML template from 'image_text.html', substitutes
+        Fills the 'image_text.html' template with
         the 'id' value, and returns the resulting HTML string.
 
         Returns:
@@ -73,27 +72,27 @@ class ImageText(SlideTemplate):
         html_values = {
             'id': self.id
         }
-        with open(os.path.join(self.templates_path, 'image_text.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/image_text.html').safe_substitute(html_values)
 
     @property
     def style(self) -> str:
         """
-        Generates the CSS style for the image text slide.
-
-        Reads the CSS template from 'image_text.css', substitutes
-        the 'id' value, and returns the resulting CSS string.
+        Generates the CSS style specific to the slide, which sets the image of the image text slide.
 
         Returns:
             str: The CSS style of the slide.
         """
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'image_text.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/slide_image.css')
+
+    @property
+    def shared_style(self) -> str:
+        """
+        Generates the CSS style shared by all the image text slides.
+
+        Returns:
+            str: The CSS style of the template.
+        """
+        return Resources.get('slides/image_text.css')
 
     @property
     def script(self) -> str:
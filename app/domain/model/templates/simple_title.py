@@ -18,11 +18,10 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -54,23 +53,16 @@ class SimpleTitle(SlideTemplate):
         html_values = {
             'id': self.id
         }
-        with open(os.path.join(self.templates_path, 'simple_title.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/simple_title.html').safe_substitute(html_values)
 
     @property
-    def style(self) -> str:
+    def shared_style(self) -> str:
         """
-        Generates the CSS style for the simple title slide.
+        Generates the CSS style shared by all the simple title slides.
 
         :return: The CSS style as a string.
         """
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'simple_title.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/simple_title.css')
 
     @property
     def script(self) -> str:
@@ -18,13 +18,12 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 from typing import Optional
 
 from app.domain.model.file import Image
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -60,23 +59,25 @@ class TextImage(SlideTemplate):
         html_values = {
             'id': self.id
         }
-        with open(os.path.join(self.templates_path, 'text_image.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/text_image.html').safe_substitute(html_values)
 
     @property
     def style(self) -> str:
         """
-        Generates the CSS style for the text image slide.
+        Generates the CSS style specific to the slide, which sets the image of the text image slide.
 
         Returns: The CSS style as a string.
         """
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'text_image.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/slide_image.css')
+
+    @property
+    def shared_style(self) -> str:
+        """
+        Generates the CSS style shared by all the text image slides.
+
+        Returns: The CSS style as a string.
+        """
+        return Resources.get('slides/text_image.css')
 
     @property
     def script(self) -> str:
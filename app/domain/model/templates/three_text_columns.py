@@ -18,11 +18,10 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -61,24 +60,16 @@ class ThreeTextColumns(SlideTemplate):
         html_values = {
             'id': self.id
         }
-        with open(os.path.join(self.templates_path, 'three_text_columns.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/three_text_columns.html').safe_substitute(html_values)
 
     @property
-    def style(self) -> str:
+    def shared_style(self) -> str:
         """
-        Generate the CSS style for the three text columns slide.
+        Generates the CSS style shared by all the three text columns slides.
 
         :return: The CSS style as a string.
         """
-
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'three_text_columns.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/three_text_columns.css')
 
     @property
     def script(self) -> str:
@@ -18,13 +18,12 @@
 """
 
 
-import os
 from dataclasses import dataclass
-from string import Template
 from typing import Optional
 
 from app.domain.model.file import Video
 from app.domain.model.templates import SlideTemplate, TemplateField, TemplateFieldType
+from app.features.resources import Resources
 
 
 @dataclass
@@ -55,17 +54,13 @@ class Video(SlideTemplate):
         ]
 
     @property
-    def style(self) -> str:
+    def shared_style(self) -> str:
         """
-        Generates the CSS style for the video slide.
+        Generates the CSS style shared by all the video slides.
+
         :return: The CSS style as a string.
         """
-        css_values = {
-            'id': self.id
-        }
-        with open(os.path.join(self.templates_path, 'video.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
+        return Resources.get('slides/video.css')
 
     @property
     def script(self) -> str:
@@ -77,9 +72,7 @@ class Video(SlideTemplate):
             'id': self.id,
             'autoplay': 'true' if self.autoplay else 'false'
         }
-        with open(os.path.join(self.templates_path, 'video.js'), 'r') as js_file:
-            js_template = js_file.read()
-        return Template(js_template).safe_substitute(js_values)
+        return Resources.template('slides/video.js').safe_substitute(js_values)
 
     @property
     def content(self) -> str:
@@ -92,6 +85,4 @@ class Video(SlideTemplate):
             'controls': 'controls' if self.controls else '',
             'loop': 'loop' if self.loop else '',
         }
-        with open(os.path.join(self.templates_path, 'video.html'), 'r') as html_file:
-            html_template = html_file.read()
-        return Template(html_template).safe_substitute(html_values)
+        return Resources.template('slides/video.html').safe_substitute(html_values)
@@ -1,8 +1,9 @@
-import os
+import hashlib
+import json
+import re
 import sass
 from dataclasses import dataclass, field
-from pathlib import Path
-from string import Template
+from functools import lru_cache
 from typing import Optional
 from uuid import uuid4
 
@@ -29,6 +30,31 @@ from pydantic import BaseModel
 
 
 from app.domain.model import ModelObject
+from app.features.resources import Resources
+from app.utils.config import get_setting
+
+
+"""
+Matches the slide selectors of the transition targets and extra CSS.
+"""
+SLIDE_SELECTOR = re.compile(r'#slide_\$(?:position\b|\{position\})')
+
+
+@lru_cache(maxsize=int(get_setting('sass_cache_entries', 4096)))
+def compile_scss(source: str) -> str:
+    """
+    Compiles SCSS code to CSS, memoizing the result.
+
+    The compiled CSS only depends on the source, which holds the transition parameters, so it can be
+    reused by every presentation using the same transition.
+
+    Args:
+        source (str): The SCSS code.
+
+    Returns:
+        str: The compiled CSS code.
+    """
+    return sass.compile(string=source)
 
 
 class TransitionId(str):
@@ -102,12 +128,35 @@ class Transition(ModelObject):
     target: str = "#slide_$position"
     extra_css: str = ""
 
-    def _gen_extra_css_(self, slide_position: int) -> str:
+    @property
+    def css_class(self) -> str:
+        """
+        Returns the CSS class shared by the slides using this transition with the same parameters.
+
+        Returns:
+            str: The CSS class of the transition.
         """
-        Generates extra CSS code based on the provided extra_css template.
+        parameters = json.dumps([
+            self.name, self.duration, self.timing_function, self.delay, self.direction, self.fill_mode,
+            self.time_line, self.iteration_count, self.play_state, self.keyframe, self.target, self.extra_css
+        ])
+        return f'tr-{self.name.lower().replace(" ", "_")}-{hashlib.sha256(parameters.encode()).hexdigest()[:12]}'
+
+    def _selectors(self, css: str) -> str:
+        """
+        Replaces the slide selectors of a CSS template with the selector of the slides using this transition.
 
         Args:
-            slide_position (int): The position of the slide.
+            css (str): The CSS template, selecting a slide with '#slide_$position'.
+
+        Returns:
+            str: The CSS code selecting every slide using this transition.
+        """
+        return SLIDE_SELECTOR.sub(f'slide.{self.css_class}', css)
+
+    def _gen_extra_css_(self) -> str:
+        """
+        Generates extra CSS code based on the provided extra_css template.
 
         Returns:
             str: The compiled CSS code, or an empty string if extra_css is empty.
@@ -116,21 +165,22 @@ class Transition(ModelObject):
         """
         if self.extra_css == "":
             return ""
-        return sass.compile(string=Template(self.extra_css).safe_substitute({'position': slide_position}))
+        return compile_scss(self._selectors(self.extra_css))
 
-    def get(self, slide_position: int) -> str:
+    def get(self) -> str:
         """
         Generates the CSS code for the transition.
 
-        Args:
-            slide_position (int): The position of the slide to which the transition is applied.
+        The keyframes and animation rules are shared by all the slides using the transition with
+        the same parameters, which are selected through the css_class of the transition.
 
         Returns:
             str: The CSS code for the transition.
 
         """
+        css_class = self.css_class
         css_values = {
-            'id': self.id,
+            'id': css_class.rsplit('-', 1)[-1],
             'name': self.name.lower().replace(' ', '_'),
             'duration': self.duration,
             'timing_function': self.timing_function,
@@ -141,23 +191,10 @@ class Transition(ModelObject):
             'iteration_count': self.iteration_count,
             'play_state': self.play_state,
             'keyframe': self.keyframe,
-            'target': Template(self.target).safe_substitute({'position': slide_position}),
-            'position': slide_position,
-            'extra_css': self._gen_extra_css_(slide_position)
+            'target': self._selectors(self.target),
+            'extra_css': self._gen_extra_css_()
         }
-        with open(os.path.join(self.templates_path, 'base_transition.css'), 'r') as css_file:
-            css_template = css_file.read()
-        return Template(css_template).safe_substitute(css_values)
-
-    @property
-    def templates_path(self) -> str:
-        """
-        Returns the path to the directory containing the transition templates.
-
-        Returns:
-            str: The path to the transition templates directory.
-        """
-        return os.path.join(Path.cwd(), 'res', 'transitions')
+        return Resources.template('transitions/base_transition.css').safe_substitute(css_values)
 
     def to_response(self) -> TransitionResponse:
         """
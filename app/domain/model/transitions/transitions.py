@@ -51,6 +51,14 @@ class Transitions(str, Enum):
             case _:
                 raise ValueError(f'Unknown template: {self}')
 
+    @classmethod
+    def warm_up(cls):
+        """
+        Compiles the CSS of every transition with its default parameters, filling the Sass cache.
+        """
+        for transition in cls:
+            transition.new_instance().get()
+
     @classmethod
     def default(cls):
         """
@@ -0,0 +1,132 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os.path
+import threading
+from typing import Optional
+
+from app.features.resources import Resources
+from app.utils.compression import compress_all
+from app.utils.minifier import minify_css, minify_enabled, minify_js
+
+"""
+The static parts of the rendered presentations, by bundle name, with the resources they are made of.
+Each theme and each animation style sheet is also bundled on its own, as 'themes/<name>.css' and
+'animations/<name>.css'.
+"""
+BUNDLES = {
+    'presentation.css': ['presentation.css'],
+    'presentation_code.css': ['presentation_code.css'],
+    'presentation.js': ['presentation.js'],
+}
+
+
+class Bundles:
+    """
+    Bundles the static parts of the rendered presentations into files named after their content.
+
+    A presentation rendered with linked assets references the bundles instead of inlining them, so
+    browsers download them once and reuse them for every presentation. Since the name of a bundle
+    changes with its content, the bundles can be cached forever. They are built again when the
+    resources change, and minified, if enabled, and compressed once when built.
+
+    Building is left to build(), awaited by the handlers; url and get only read the bundles of the
+    last build, so they never block the event loop.
+    """
+    _lock = threading.Lock()
+    _version: Optional[str] = None
+    _urls: dict[str, str] = {}
+    _files: dict[str, tuple[str, dict[str, bytes]]] = {}
+
+    @classmethod
+    def _build(cls):
+        """
+        Builds the bundles from the current resources, if they changed since the last build.
+        """
+        version = Resources.version
+        if cls._version == version:
+            return
+        with cls._lock:
+            if cls._version == version:
+                return
+            minify = minify_enabled('bundles')
+            sources = dict(BUNDLES)
+            for directory in ('themes', 'animations'):
+                sources.update({name: [name] for name in Resources.list_resources(directory, '.css')})
+            urls, files = {}, {}
+            for name, resources in sources.items():
+                content = '\n'.join([Resources.get(resource) for resource in resources])
+                if minify:
+                    content = minify_css(content) if name.endswith('.css') else minify_js(content)
+                stem, extension = os.path.splitext(name.replace('/', '-'))
+                filename = f'{stem}.{hashlib.sha256(content.encode()).hexdigest()[:12]}{extension}'
+                urls[name] = f'/static/bundles/{filename}'
+                files[filename] = content, compress_all(content.encode())
+            cls._urls, cls._files, cls._version = urls, files, version
+
+    @classmethod
+    async def build(cls):
+        """
+        Builds the bundles in a thread, away from the event loop, if the resources changed since the
+        last build.
+
+        Minifying and compressing every bundle takes a while, so the handlers await this before using
+        the bundles instead of building them on the event loop.
+        """
+        if cls._version != Resources.version:
+            await asyncio.to_thread(cls._build)
+
+    @classmethod
+    def url(cls, name: str) -> str:
+        """
+        Returns the URL of a bundle, from the last build.
+
+        Args:
+            name (str): The name of the bundle, e.g. 'presentation.css' or 'themes/glass.css'.
+
+        Returns:
+            str: The URL of the bundle, which changes with its content.
+
+        Raises:
+            FileNotFoundError: If the bundle does not exist, or the bundles were never built.
+        """
+        if name not in cls._urls:
+            raise FileNotFoundError(f"The bundle '{name}' does not exist.")
+        return cls._urls[name]
+
+    @classmethod
+    def get(cls, filename: str) -> Optional[tuple[str, str, dict[str, bytes]]]:
+        """
+        Returns the content of a bundle file, from the last build.
+
+        Args:
+            filename (str): The file name of the bundle, as found in its URL.
+
+        Returns:
+            Optional[tuple[str, str, dict[str, bytes]]]: The content, the media type and the
+                compressed variants by content coding of the bundle, or None if no bundle of the
+                last build has this file name.
+        """
+        bundled = cls._files.get(filename)
+        if bundled is None:
+            return None
+        content, encoded = bundled
+        return content, mimetypes.guess_type(filename)[0] or 'application/octet-stream', encoded
@@ -0,0 +1,210 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import threading
+from typing import Callable, Union
+
+
+class PresentationIndex:
+    """
+    Persistent metadata index of the presentations stored in a directory.
+
+    The index is an append-only JSON lines file kept in the config directory, next to the
+    presentations directory. Each line holds the id, title, slide count, modification time and
+    size of a presentation file (or a tombstone for a removed one); the last line for an id wins.
+    The file is compacted when it holds too many superseded lines.
+
+    Entries are checked against the modification time and size of the presentation files before
+    being listed, so files written outside the application are re-indexed automatically. A file is
+    re-indexed through the reader given by the store, if any, so the changes journaled since its
+    last snapshot are taken into account.
+    """
+    _instances: dict[str, 'PresentationIndex'] = {}
+
+    def __init__(
+            self,
+            presentations_dir: str,
+            read: Union[Callable[[str], Union[tuple[str, int], None]], None] = None
+    ):
+        self.presentations_dir = presentations_dir
+        self.read = read
+        self.index_file = os.path.join(os.path.dirname(presentations_dir), 'presentations_index.jsonl')
+        self._entries: Union[dict[str, dict], None] = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_dir(
+            cls,
+            presentations_dir: str,
+            read: Union[Callable[[str], Union[tuple[str, int], None]], None] = None
+    ) -> 'PresentationIndex':
+        """
+        Returns the index of the given presentations directory.
+
+        Args:
+            presentations_dir (str): The directory where presentations are stored.
+            read (Callable | None): A function returning the title and slide count of a
+                presentation from its ID, or None if it cannot be read. The presentation files are
+                parsed directly if None.
+
+        Returns:
+            PresentationIndex: The index of the directory.
+        """
+        if presentations_dir not in cls._instances:
+            cls._instances[presentations_dir] = cls(presentations_dir, read)
+        elif read is not None:
+            cls._instances[presentations_dir].read = read
+        return cls._instances[presentations_dir]
+
+    def _load(self) -> dict[str, dict]:
+        """
+        Loads the index file, if not already loaded.
+        """
+        if self._entries is not None:
+            return self._entries
+        entries = {}
+        lines = 0
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    lines += 1
+                    if entry.get('removed'):
+                        entries.pop(entry['id'], None)
+                    else:
+                        entries[entry['id']] = entry
+        self._entries = entries
+        self._lines = lines
+        return entries
+
+    def _append(self, entry: dict):
+        """
+        Appends an entry to the index file, compacting it if needed.
+        """
+        with open(self.index_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        self._lines += 1
+        if self._lines > 2 * len(self._entries) + 64:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrites the index file with only the current entries.
+        """
+        tmp_file = f'{self.index_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp_file, self.index_file)
+        self._lines = len(self._entries)
+
+    def update(self, id: str, title: str, slides: int):
+        """
+        Records the metadata of a presentation that has just been written.
+
+        Args:
+            id (str): The ID of the presentation.
+            title (str): The title of the presentation.
+            slides (int): The number of slides of the presentation.
+        """
+        stat = os.stat(os.path.join(self.presentations_dir, f'{id}.json'))
+        entry = {'id': id, 'title': title, 'slides': slides, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+        with self._lock:
+            entries = self._load()
+            if entries.get(id) != entry:
+                entries[id] = entry
+                self._append(entry)
+
+    def remove(self, id: str):
+        """
+        Removes a presentation from the index.
+
+        Args:
+            id (str): The ID of the presentation.
+        """
+        with self._lock:
+            entries = self._load()
+            if entries.pop(id, None) is not None:
+                self._append({'id': id, 'removed': True})
+
+    def _summary(self, id: str, path: str) -> Union[tuple[str, int], None]:
+        """
+        Returns the title and slide count of a presentation, or None if it cannot be read.
+        """
+        if self.read is not None:
+            return self.read(id)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return data.get('title', ''), len(data.get('slides', []))
+
+    def _refresh(self) -> dict[str, dict]:
+        """
+        Brings the index up to date with the presentation files.
+
+        Only the files whose modification time or size changed are parsed.
+        """
+        entries = self._load()
+        seen = set()
+        with os.scandir(self.presentations_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith('.json') or not dir_entry.is_file():
+                    continue
+                id = dir_entry.name[:-len('.json')]
+                seen.add(id)
+                stat = dir_entry.stat()
+                entry = entries.get(id)
+                if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                    continue
+                summary = self._summary(id, dir_entry.path)
+                if summary is None:
+                    continue
+                entry = {
+                    'id': id,
+                    'title': summary[0],
+                    'slides': summary[1],
+                    'mtime': stat.st_mtime_ns,
+                    'size': stat.st_size
+                }
+                entries[id] = entry
+                self._append(entry)
+        for id in [id for id in entries if id not in seen]:
+            del entries[id]
+            self._append({'id': id, 'removed': True})
+        return entries
+
+    def entries(self) -> list[dict]:
+        """
+        Returns the metadata of all the presentations, sorted by title.
+
+        The presentations directory is scanned, so this should be run in a thread.
+
+        Returns:
+            list[dict]: The id, title, slide count, modification time and size of each presentation.
+        """
+        with self._lock:
+            entries = list(self._refresh().values())
+        return sorted(entries, key=lambda e: (e['title'].casefold(), e['id']))
@@ -0,0 +1,348 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, AsyncIterator, BinaryIO, Union
+
+from app.utils.config import media_dir, get_setting
+from app.utils.decorators import classproperty
+from app.utils.errors import EmptyMediaError, MediaTooLargeError, UnsupportedFileTypeError
+
+"""
+The number of first bytes of a file from which its MIME type is sniffed.
+"""
+SNIFF_SIZE = 512
+
+"""
+The number of bytes of an uploaded file gathered before they are written and hashed in a thread.
+"""
+WRITE_BATCH_SIZE = 1024 * 1024
+
+MEDIA_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'\x1a\x45\xdf\xa3', 'video/webm'),
+    (b'OggS', 'video/ogg'),
+)
+
+"""
+The brands of the ISO base media files ('ftyp' box) holding still images rather than videos, with
+their MIME type. The generic HEIF brands are told apart by the compatible brands listed with them.
+"""
+IMAGE_BRANDS = {
+    b'avif': 'image/avif',
+    b'avis': 'image/avif',
+    b'heic': 'image/heic',
+    b'heix': 'image/heic',
+    b'heim': 'image/heic',
+    b'heis': 'image/heic',
+    b'hevc': 'image/heic',
+    b'hevx': 'image/heic',
+    b'mif1': 'image/heif',
+    b'msf1': 'image/heif',
+}
+
+
+class MediaStore:
+    """
+    Content-addressed store for uploaded media files.
+
+    Each blob is written once under its SHA-256 digest, next to a small metadata
+    file holding its MIME type, so presentations only need to keep a reference.
+    """
+
+    @classproperty
+    def media_path(cls) -> str:
+        """
+        Returns the path to the directory containing media blobs.
+
+        Returns:
+            str: The path to the media directory.
+        """
+        return media_dir
+
+    @staticmethod
+    def is_valid_hash(digest: str) -> bool:
+        """
+        Checks whether the given string is a valid SHA-256 hex digest.
+
+        Args:
+            digest (str): The digest to check.
+
+        Returns:
+            bool: True if the digest is valid, False otherwise.
+        """
+        return re.fullmatch(r'[0-9a-f]{64}', digest or '') is not None
+
+    @classmethod
+    def blob_path(cls, digest: str) -> str:
+        """
+        Returns the path of the blob stored under the given digest.
+
+        Args:
+            digest (str): The SHA-256 digest of the blob.
+
+        Returns:
+            str: The path of the blob file.
+        """
+        if not cls.is_valid_hash(digest):
+            raise ValueError(f'Invalid media hash: {digest}')
+        return os.path.join(cls.media_path, digest[:2], digest)
+
+    @classmethod
+    def exists(cls, digest: str) -> bool:
+        """
+        Checks whether a blob is stored under the given digest.
+        """
+        return cls.is_valid_hash(digest) and os.path.exists(cls.blob_path(digest))
+
+    @classmethod
+    def media_type(cls, digest: str) -> Union[str, None]:
+        """
+        Returns the MIME type recorded for the given blob.
+
+        Args:
+            digest (str): The SHA-256 digest of the blob.
+
+        Returns:
+            str | None: The MIME type, or None if it is unknown.
+        """
+        meta_path = f'{cls.blob_path(digest)}.json'
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as meta_file:
+            return json.load(meta_file).get('type')
+
+    @classmethod
+    def put(cls, data: bytes, media_type: Union[str, None] = None) -> str:
+        """
+        Stores the given bytes and returns their digest.
+
+        The blob is only written if it is not already present. Its MIME type is sniffed from its
+        first bytes, content that is not a known image or video being recorded as
+        'application/octet-stream'.
+
+        Args:
+            data (bytes): The content to store.
+            media_type (str | None): The MIME type declared for the content.
+
+        Returns:
+            str: The SHA-256 digest of the content.
+        """
+        media_type = cls.guess_type(data[:SNIFF_SIZE], declared=media_type) or 'application/octet-stream'
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = cls.blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+        cls._write_meta(digest, media_type)
+        return digest
+
+    @classproperty
+    def max_upload_size(cls) -> int:
+        """
+        Returns the maximum size of an uploaded media file in bytes ('max_upload_size' setting).
+        """
+        return int(get_setting('max_upload_size', 512 * 1024 * 1024))
+
+    @staticmethod
+    def guess_type(head: bytes, declared: Union[str, None] = None) -> Union[str, None]:
+        """
+        Guesses the MIME type of a file from its first bytes.
+
+        Only images and videos are recognized: the declared type is never trusted on its own, as
+        the media are served from the same origin as the presentations.
+
+        Args:
+            head (bytes): The first bytes of the file.
+            declared (str | None): The MIME type declared by the client, used to tell apart the
+                videos sharing the same container.
+
+        Returns:
+            str | None: The MIME type of the file, or None if it is not a known image or video.
+        """
+        for signature, media_type in MEDIA_SIGNATURES:
+            if head.startswith(signature):
+                return media_type
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'image/webp'
+        if head[:2] == b'BM' and head[6:10] == b'\x00\x00\x00\x00':
+            return 'image/bmp'
+        if head[4:8] == b'ftyp':
+            image_type = MediaStore._image_brand(head)
+            if image_type is not None:
+                return image_type
+            return declared if declared in ('video/mp4', 'video/quicktime') else 'video/mp4'
+        markup = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+        if markup.startswith(b'<svg') or markup.startswith((b'<?xml', b'<!--', b'<!DOCTYPE svg')) and b'<svg' in markup:
+            return 'image/svg+xml'
+        return None
+
+    @staticmethod
+    def _image_brand(head: bytes) -> Union[str, None]:
+        """
+        Returns the MIME type of an ISO base media file holding images, from the brands of its
+        'ftyp' box, or None if it holds a video.
+        """
+        size = int.from_bytes(head[:4], 'big')
+        brands = [head[8:12]] + [head[i:i + 4] for i in range(16, min(size, len(head)) - 3, 4)]
+        types = [IMAGE_BRANDS.get(brand) for brand in brands]
+        if types[0] == 'image/heif':
+            # a generic HEIF brand is refined by the first specific one listed with it
+            return next((media_type for media_type in types[1:] if media_type not in (None, 'image/heif')), types[0])
+        return types[0]
+
+    @classmethod
+    async def put_stream(
+            cls,
+            chunks: AsyncIterator[bytes],
+            media_type: Union[str, None] = None,
+            max_size: Union[int, None] = None
+    ) -> tuple[str, int, str]:
+        """
+        Stores a stream of bytes chunk by chunk, without buffering the whole content in memory.
+
+        The size, digest and MIME type are computed while the chunks are written to a temporary
+        file, which is then moved to its content-addressed location. The chunks are written and
+        hashed in a thread, by batches of WRITE_BATCH_SIZE bytes, so large uploads do not block
+        the event loop. Only images and videos, as recognized from their first bytes, are accepted.
+
+        Args:
+            chunks (AsyncIterator[bytes]): The content to store.
+            media_type (str | None): The MIME type declared by the client.
+            max_size (int | None): The maximum size of the content, defaults to the 'max_upload_size' setting.
+
+        Returns:
+            tuple[str, int, str]: The digest, size and MIME type of the content.
+
+        Raises:
+            EmptyMediaError: If the content is empty.
+            MediaTooLargeError: If the content exceeds the maximum size.
+            UnsupportedFileTypeError: If the content is not a known image or video.
+        """
+        max_size = cls.max_upload_size if max_size is None else max_size
+        sha256 = hashlib.sha256()
+        size = 0
+        head = b''
+        batch, batch_size = [], 0
+        fd, tmp_path = tempfile.mkstemp(dir=cls.media_path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_size:
+                        raise MediaTooLargeError(max_size=max_size)
+                    if len(head) < SNIFF_SIZE:
+                        head += chunk[:SNIFF_SIZE - len(head)]
+                    batch.append(chunk)
+                    batch_size += len(chunk)
+                    if batch_size >= WRITE_BATCH_SIZE:
+                        await asyncio.to_thread(cls._write_chunks, f, sha256, batch)
+                        batch, batch_size = [], 0
+                if batch:
+                    await asyncio.to_thread(cls._write_chunks, f, sha256, batch)
+            if size == 0:
+                raise EmptyMediaError()
+            detected_type = cls.guess_type(head, declared=media_type)
+            if detected_type is None:
+                raise UnsupportedFileTypeError(message='Unsupported media type', file_type=media_type)
+            digest = sha256.hexdigest()
+            await asyncio.to_thread(cls._move_blob, tmp_path, digest, detected_type)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, size, detected_type
+
+    @staticmethod
+    def _write_chunks(f: BinaryIO, sha256: Any, chunks: list[bytes]):
+        """
+        Writes a batch of chunks to a file and adds them to its digest.
+        """
+        for chunk in chunks:
+            sha256.update(chunk)
+            f.write(chunk)
+
+    @classmethod
+    def _move_blob(cls, tmp_path: str, digest: str, media_type: Union[str, None]):
+        """
+        Moves a temporary file to the location of the blob with the given digest, unless the blob
+        is already stored, and records its MIME type.
+        """
+        blob_path = cls.blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, blob_path)
+        cls._write_meta(digest, media_type)
+
+    @classmethod
+    def _write_meta(cls, digest: str, media_type: Union[str, None]):
+        """
+        Records the MIME type of a blob if none is known yet.
+        """
+        meta_path = f'{cls.blob_path(digest)}.json'
+        if media_type and not os.path.exists(meta_path):
+            with open(meta_path, 'w') as meta_file:
+                json.dump({'type': media_type}, meta_file)
+
+    @classmethod
+    def read(cls, digest: str) -> bytes:
+        """
+        Reads the blob stored under the given digest.
+
+        Args:
+            digest (str): The SHA-256 digest of the blob.
+
+        Returns:
+            bytes: The content of the blob.
+        """
+        with open(cls.blob_path(digest), 'rb') as f:
+            return f.read()
+
+    @classmethod
+    async def iter_read(cls, digest: str, block_size: int) -> AsyncIterator[bytes]:
+        """
+        Reads the blob stored under the given digest block by block, in a thread.
+
+        Args:
+            digest (str): The SHA-256 digest of the blob.
+            block_size (int): The size of the blocks, in bytes.
+
+        Returns:
+            AsyncIterator[bytes]: The blocks of the blob.
+        """
+        f = await asyncio.to_thread(open, cls.blob_path(digest), 'rb')
+        try:
+            while block := await asyncio.to_thread(f.read, block_size):
+                yield block
+        finally:
+            f.close()
@@ -0,0 +1,496 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from app.domain.model.slides import Slide, SlideFragments, fragment_cache
+from app.features.resources import Resources
+from app.utils.config import get_setting
+from app.utils.decorators import classproperty
+from app.utils.errors import RenderPoolBusyError, RenderTimeoutError
+from app.features.rendering.worker import _init_worker, _render_batch
+
+T = TypeVar('T')
+
+
+class RenderPool:
+    """
+    Runs the renders on a bounded pool of threads, away from the event loop.
+
+    At most 'render_threads' renders run at once and 'render_queue_size' more wait for a thread.
+    Beyond that, renders are rejected with a RenderPoolBusyError so the server answers with a 503
+    instead of queueing work it cannot do in time. A render that takes longer than 'render_timeout'
+    seconds raises a RenderTimeoutError; its thread cannot be interrupted and keeps its place in the
+    pool until the render ends, but the result is discarded.
+    """
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    _pending = 0
+    _running = 0
+    _counters = {'completed': 0, 'rejected': 0, 'timeouts': 0}
+    _wait_time = 0.0
+    _max_wait_time = 0.0
+    _render_time = 0.0
+
+    @classproperty
+    def threads(cls) -> int:
+        """
+        Returns the number of renders that can run at once.
+        """
+        return max(1, int(get_setting('render_threads', 2)))
+
+    @classproperty
+    def queue_size(cls) -> int:
+        """
+        Returns the number of renders that can wait for a thread.
+        """
+        return max(0, int(get_setting('render_queue_size', 16)))
+
+    @classproperty
+    def timeout(cls) -> float:
+        """
+        Returns the maximum duration of a render, in seconds.
+        """
+        return float(get_setting('render_timeout', 30.0))
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """
+        Returns the pool of render threads, starting it on first use.
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.threads, thread_name_prefix='render')
+            return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Stops the render threads, cancelling the renders that did not start.
+        """
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def retry_after(cls) -> int:
+        """
+        Returns the estimated number of seconds before the queue has room again.
+        """
+        completed = cls._counters['completed']
+        average = cls._render_time / completed if completed else 1.0
+        return max(1, math.ceil(average * cls._pending / cls.threads))
+
+    @classmethod
+    def check(cls):
+        """
+        Checks that the queue has room for a render, so a response can be refused before it starts.
+
+        Raises:
+            RenderPoolBusyError: If the queue is full.
+        """
+        with cls._lock:
+            if cls._pending >= cls.threads + cls.queue_size:
+                cls._counters['rejected'] += 1
+                raise RenderPoolBusyError(retry_after=cls.retry_after())
+
+    @classmethod
+    def _release(cls):
+        with cls._lock:
+            cls._pending -= 1
+
+    @classmethod
+    def deadline(cls) -> float:
+        """
+        Returns the time, on the monotonic clock, by which a render starting now must be done.
+        """
+        return time.monotonic() + cls.timeout
+
+    @classmethod
+    def submit(cls, func: Callable[..., T], *args) -> Future:
+        """
+        Queues a render on the pool, accepting or refusing it at once.
+
+        Args:
+            func (Callable[..., T]): The function doing the render.
+            *args: The arguments of the function.
+
+        Returns:
+            Future: The future result of the function, to be awaited with wait.
+
+        Raises:
+            RenderPoolBusyError: If the queue is full.
+        """
+        with cls._lock:
+            if cls._pending >= cls.threads + cls.queue_size:
+                cls._counters['rejected'] += 1
+                raise RenderPoolBusyError(retry_after=cls.retry_after())
+            cls._pending += 1
+        submitted = time.monotonic()
+
+        def task() -> T:
+            started = time.monotonic()
+            with cls._lock:
+                cls._running += 1
+                cls._wait_time += started - submitted
+                cls._max_wait_time = max(cls._max_wait_time, started - submitted)
+            try:
+                return func(*args)
+            finally:
+                with cls._lock:
+                    cls._running -= 1
+                    cls._pending -= 1
+                    cls._counters['completed'] += 1
+                    cls._render_time += time.monotonic() - started
+
+        return cls.executor().submit(task)
+
+    @classmethod
+    async def wait(cls, future: Future, deadline: Optional[float] = None) -> T:
+        """
+        Waits for the result of a render queued with submit.
+
+        Args:
+            future (Future): The future result of the render.
+            deadline (Optional[float]): The time, on the monotonic clock, by which the render must be
+                done, 'render_timeout' seconds from now if None.
+
+        Returns:
+            T: The result of the render.
+
+        Raises:
+            RenderTimeoutError: If the render was not done by the deadline.
+        """
+        timeout = cls.timeout if deadline is None else deadline - time.monotonic()
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), max(timeout, 0))
+        except TimeoutError:
+            with cls._lock:
+                cls._counters['timeouts'] += 1
+            raise RenderTimeoutError(timeout=cls.timeout) from None
+        finally:
+            # a render given up on before it started is dropped from the queue
+            if future.cancel():
+                cls._release()
+
+    @classmethod
+    async def run(cls, func: Callable[..., T], *args, deadline: Optional[float] = None) -> T:
+        """
+        Runs a render on the pool and waits for its result.
+
+        Args:
+            func (Callable[..., T]): The function doing the render.
+            *args: The arguments of the function.
+            deadline (Optional[float]): The time, on the monotonic clock, by which the render must be
+                done, 'render_timeout' seconds from now if None.
+
+        Returns:
+            T: The result of the function.
+
+        Raises:
+            RenderPoolBusyError: If the queue is full.
+            RenderTimeoutError: If the render did not complete in time.
+        """
+        return await cls.wait(cls.submit(func, *args), deadline)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns the state and the counters of the pool.
+        """
+        with cls._lock:
+            completed = cls._counters['completed']
+            return {
+                'threads': cls.threads,
+                'queue_size': cls.queue_size,
+                'running': cls._running,
+                'queued': cls._pending - cls._running,
+                **cls._counters,
+                'avg_wait_ms': round(cls._wait_time / completed * 1000, 3) if completed else 0.0,
+                'max_wait_ms': round(cls._max_wait_time * 1000, 3),
+                'avg_render_ms': round(cls._render_time / completed * 1000, 3) if completed else 0.0,
+            }
+
+
+class SlideRenderer:
+    """
+    Renders the fragments of the slides of a presentation.
+
+    The slides missing from the fragment cache are rendered on the RenderPool. When there are at
+    least 'render_parallel_min_slides' of them and 'render_workers' is set, they are sent in
+    batches to a pool of worker processes, so markdown, Pygments and Sass run on several cores, and
+    the results are put back in order.
+
+    Concurrent renders of the same slide are coalesced: a slide already being rendered for another
+    request is awaited instead of rendered again.
+    """
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+    _in_flight: dict[str, asyncio.Future] = {}
+
+    @classproperty
+    def workers(cls) -> int:
+        """
+        Returns the number of worker processes, 0 if slides are rendered in the current process.
+        """
+        return int(get_setting('render_workers', 0))
+
+    @classproperty
+    def min_slides(cls) -> int:
+        """
+        Returns the minimum number of slides to render for the worker processes to be used.
+        """
+        return int(get_setting('render_parallel_min_slides', 100))
+
+    @classproperty
+    def batch_size(cls) -> int:
+        """
+        Returns the number of slides rendered at once when the slides are streamed, at least
+        'render_parallel_min_slides' when the worker processes are used.
+        """
+        batch_size = max(1, int(get_setting('render_batch_size', 16)))
+        return max(batch_size, cls.min_slides) if cls.workers > 0 else batch_size
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        """
+        Returns the pool of worker processes, starting it on first use.
+
+        The workers are started from a fork server, a single-threaded process which imports the
+        worker module once, rather than forked from the application, whose threads could hold locks
+        the workers would inherit. Each worker loads the resources when it starts and reads the
+        settings from the same configuration file.
+        """
+        with cls._lock:
+            if cls._executor is None:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([_render_batch.__module__])
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=cls.workers, mp_context=context, initializer=_init_worker
+                )
+            return cls._executor
+
+    @classmethod
+    def start(cls):
+        """
+        Starts the pool of worker processes if 'render_workers' is set, so the first render does
+        not wait for them.
+        """
+        if cls.workers > 0:
+            for future in [cls.executor().submit(_init_worker) for _ in range(cls.workers)]:
+                future.result()
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Stops the worker processes.
+        """
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    @classmethod
+    def _render(cls, slides: list[Slide], hidden: bool) -> list[SlideFragments]:
+        """
+        Renders the fragments of slides, in the current thread or on the worker processes.
+        """
+        if cls.workers <= 0 or len(slides) < cls.min_slides:
+            return [slide.render_fragments(hidden=hidden) for slide in slides]
+        batch_size = math.ceil(len(slides) / (cls.workers * 4))
+        version = Resources.version
+        futures = [
+            cls.executor().submit(
+                _render_batch, version, [slide.to_json() for slide in slides[i:i + batch_size]], hidden
+            )
+            for i in range(0, len(slides), batch_size)
+        ]
+        return [fragment for future in futures for fragment in future.result()]
+
+    @classmethod
+    def _rendered(cls, keys: list[str], task: asyncio.Task):
+        """
+        Caches the fragments of a render and hands them to the requests waiting for them.
+        """
+        futures = [cls._in_flight.pop(key) for key in keys]
+        if task.cancelled():
+            for future in futures:
+                future.cancel()
+        elif task.exception() is not None:
+            for future in futures:
+                future.set_exception(task.exception())
+                # the error is raised by the requests awaiting the render, if any
+                future.exception()
+        else:
+            for key, future, fragment in zip(keys, futures, task.result()):
+                fragment_cache.put(key, fragment, size=fragment.size)
+                future.set_result(fragment)
+
+    @classmethod
+    async def render(
+            cls,
+            slides: list[Slide],
+            hidden: bool = True,
+            stats: Optional[dict] = None,
+            deadline: Optional[float] = None
+    ) -> list[SlideFragments]:
+        """
+        Returns the fragments of slides, through the fragment cache.
+
+        Args:
+            slides (list[Slide]): The slides to render.
+            hidden (bool): Whether the slides should be initially hidden (default: True).
+            stats (Optional[dict]): A dictionary whose 'hits' and 'misses' counters are incremented.
+            deadline (Optional[float]): The time, on the monotonic clock, by which the slides must be
+                rendered, 'render_timeout' seconds from now if None.
+
+        Returns:
+            list[SlideFragments]: The fragments of the slides, in the same order.
+
+        Raises:
+            RenderPoolBusyError: If the render pool queue is full.
+            RenderTimeoutError: If the slides were not rendered in time.
+        """
+        return await cls._start(slides, hidden, stats, RenderPool.deadline() if deadline is None else deadline)
+
+    @classmethod
+    def _start(
+            cls,
+            slides: list[Slide],
+            hidden: bool,
+            stats: Optional[dict],
+            deadline: float
+    ) -> Awaitable[list[SlideFragments]]:
+        """
+        Queues the render of the slides missing from the fragment cache, refused at once if the
+        render pool is busy, and returns the fragments of all the slides to await.
+        """
+        keys = [slide.fragment_key(hidden) for slide in slides]
+        fragments = [fragment_cache.get(key) for key in keys]
+        missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+        rendering = {keys[i]: slides[i] for i in missing if keys[i] not in cls._in_flight}
+        if rendering:
+            future = RenderPool.submit(cls._render, list(rendering.values()), hidden)
+            loop = asyncio.get_running_loop()
+            for key in rendering:
+                cls._in_flight[key] = loop.create_future()
+            # the render goes on if this request is cancelled, as others may be waiting for it
+            task = asyncio.ensure_future(RenderPool.wait(future, deadline))
+            task.add_done_callback(partial(cls._rendered, list(rendering)))
+        if stats is not None:
+            stats['hits'] = stats.get('hits', 0) + len(slides) - len(missing)
+            stats['misses'] = stats.get('misses', 0) + len(missing)
+        futures = {keys[i]: cls._in_flight[keys[i]] for i in missing}
+        return cls._gather(fragments, [keys[i] for i in missing], futures, deadline)
+
+    @staticmethod
+    async def _gather(
+            fragments: list[Optional[SlideFragments]],
+            missing: list[str],
+            futures: dict[str, asyncio.Future],
+            deadline: float
+    ) -> list[SlideFragments]:
+        """
+        Waits until the deadline for the slides being rendered, by this request or by others.
+        """
+        if not futures:
+            return fragments
+        try:
+            rendered = await asyncio.wait_for(
+                asyncio.shield(asyncio.gather(*futures.values())), max(deadline - time.monotonic(), 0)
+            )
+        except TimeoutError:
+            raise RenderTimeoutError(timeout=RenderPool.timeout) from None
+        shared = dict(zip(futures, rendered))
+        missing_keys = iter(missing)
+        return [fragment if fragment is not None else shared[next(missing_keys)] for fragment in fragments]
+
+    @classmethod
+    def iter_render(
+            cls,
+            slides: list[Slide],
+            hidden: bool = True,
+            stats: Optional[dict] = None
+    ) -> AsyncIterator[SlideFragments]:
+        """
+        Returns the fragments of slides one by one, through the fragment cache.
+
+        The slides are rendered by batches of 'render_batch_size' slides, the next batch being
+        rendered while the fragments of the current one are consumed, so the first fragments come
+        without waiting for the whole presentation and only a batch or two are held at once.
+
+        The render of the first batch is queued when this is called, so a busy render pool is
+        reported before anything is sent, and the whole render must be done within 'render_timeout'
+        seconds, not counting the time the fragments wait to be consumed.
+
+        Args:
+            slides (list[Slide]): The slides to render.
+            hidden (bool): Whether the slides should be initially hidden (default: True).
+            stats (Optional[dict]): A dictionary whose 'hits' and 'misses' counters are incremented.
+
+        Returns:
+            AsyncIterator[SlideFragments]: The fragments of the slides, in the same order.
+
+        Raises:
+            RenderPoolBusyError: If the render pool queue is full, when called or later on.
+            RenderTimeoutError: If the slides were not all rendered in time.
+        """
+        deadline = RenderPool.deadline()
+        size = cls.batch_size
+        batches = [slides[i:i + size] for i in range(0, len(slides), size)]
+        first = None
+        if batches:
+            first = asyncio.ensure_future(cls._start(batches[0], hidden, stats, deadline))
+            # the error of a render nobody waits for is dropped
+            first.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return cls._iter_render(batches, first, hidden, stats, deadline)
+
+    @classmethod
+    async def _iter_render(
+            cls,
+            batches: list[list[Slide]],
+            first: Optional[asyncio.Future],
+            hidden: bool,
+            stats: Optional[dict],
+            deadline: float
+    ) -> AsyncIterator[SlideFragments]:
+        tasks: list[asyncio.Future] = [first] if first is not None else []
+        try:
+            for i in range(len(batches)):
+                if i + 1 < len(batches):
+                    tasks.append(asyncio.ensure_future(cls._start(batches[i + 1], hidden, stats, deadline)))
+                fragments = await tasks[0]
+                tasks.pop(0)
+                for fragment in fragments:
+                    paused = time.monotonic()
+                    yield fragment
+                    # the time spent waiting for the reader is not part of the render
+                    deadline += time.monotonic() - paused
+        finally:
+            for task in tasks:
+                task.cancel()
+                # the error of a render nobody waits for anymore is dropped
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
@@ -0,0 +1,51 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+
+from app.domain.model.slides import Slide, SlideFragments
+from app.features.resources import Resources
+
+"""
+This module holds the entry points of the render worker processes. The fork server imports it ahead
+of them, along with the modules it needs, none of which builds the application.
+"""
+
+
+def _init_worker():
+    """
+    Loads the resources in a new worker process, before it renders its first batch.
+    """
+    Resources.load()
+
+
+def _render_batch(resources_version: str, slides: list[str], hidden: bool) -> list[SlideFragments]:
+    """
+    Renders the fragments of a batch of slides in a worker process.
+
+    Args:
+        resources_version (str): The version of the resources in the main process.
+        slides (list[str]): The JSON representations of the slides.
+        hidden (bool): Whether the slides should be initially hidden.
+
+    Returns:
+        list[SlideFragments]: The fragments of the slides, in the same order.
+    """
+    if Resources.version != resources_version:
+        Resources.load()
+    return [Slide.from_dict(json.loads(slide)).render_fragments(hidden=hidden) for slide in slides]
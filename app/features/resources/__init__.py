@@ -0,0 +1,234 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import os
+import threading
+from string import Template
+from typing import Optional
+
+from app.utils.config import resources_dir
+from app.utils.decorators import classproperty
+from app.utils.logger import logger
+
+RESOURCE_EXTENSIONS = ('.html', '.css', '.js')
+
+
+class Resources:
+    """
+    Registry of the text resources used to render presentations and the editor.
+
+    The HTML, CSS and JavaScript files of the resources directory are read once and kept in
+    memory, along with their compiled string.Template, so rendering does not touch the disk.
+    Resources are named by their path relative to the resources directory, e.g.
+    'slides/base_slide.html'. The static directory is served as is and is not loaded.
+
+    In development, the registry can poll the resources directory and reload the files that changed.
+    """
+    _digest: str = ''
+    _texts: dict[str, str] = {}
+    _templates: dict[str, Template] = {}
+    _mtimes: dict[str, int] = {}
+    _loaded = False
+    _lock = threading.Lock()
+    _watcher: Optional[threading.Thread] = None
+    _stop = threading.Event()
+
+    @classproperty
+    def resources_path(cls) -> str:
+        """
+        Returns the path to the resources directory.
+
+        Returns:
+            str: The path to the resources directory.
+        """
+        return resources_dir
+
+    @classproperty
+    def version(cls) -> str:
+        """
+        Returns the SHA-256 digest of the loaded resources, which changes whenever one of them changes.
+
+        Returns:
+            str: The version of the resources.
+        """
+        if not cls._loaded:
+            cls.load()
+        return cls._digest
+
+    @classmethod
+    def _scan(cls) -> dict[str, int]:
+        """
+        Returns the modification time of every resource file, by name.
+        """
+        mtimes = {}
+        for root, dirs, files in os.walk(cls.resources_path):
+            dirs[:] = [d for d in dirs if not (root == cls.resources_path and d == 'static')]
+            for file in files:
+                if file.endswith(RESOURCE_EXTENSIONS):
+                    path = os.path.join(root, file)
+                    name = os.path.relpath(path, cls.resources_path).replace(os.sep, '/')
+                    mtimes[name] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    @classmethod
+    def load(cls):
+        """
+        Loads all the resource files into memory, replacing the ones already loaded.
+        """
+        with cls._lock:
+            mtimes = cls._scan()
+            texts = {}
+            for name in mtimes:
+                with open(os.path.join(cls.resources_path, name), 'r') as file:
+                    texts[name] = file.read()
+            digest = hashlib.sha256()
+            for name in sorted(texts):
+                digest.update(name.encode())
+                digest.update(texts[name].encode())
+            cls._texts = texts
+            cls._digest = digest.hexdigest()
+            cls._templates = {name: Template(text) for name, text in texts.items()}
+            cls._mtimes = mtimes
+            cls._loaded = True
+
+    @classmethod
+    def reload_changed(cls) -> list[str]:
+        """
+        Reloads the resource files added, changed or removed since they were loaded.
+
+        Returns:
+            list[str]: The names of the reloaded resources.
+        """
+        mtimes = cls._scan()
+        changed = [name for name in mtimes.keys() | cls._mtimes.keys() if mtimes.get(name) != cls._mtimes.get(name)]
+        if changed:
+            cls.load()
+        return changed
+
+    @classmethod
+    def get(cls, name: str) -> str:
+        """
+        Returns the content of a resource file.
+
+        Args:
+            name (str): The name of the resource, relative to the resources directory.
+
+        Returns:
+            str: The content of the resource.
+
+        Raises:
+            FileNotFoundError: If the resource does not exist.
+        """
+        if not cls._loaded:
+            cls.load()
+        try:
+            return cls._texts[name]
+        except KeyError:
+            raise FileNotFoundError(f"The resource '{name}' does not exist.")
+
+    @classmethod
+    def template(cls, name: str) -> Template:
+        """
+        Returns the compiled template of a resource file.
+
+        Args:
+            name (str): The name of the resource, relative to the resources directory.
+
+        Returns:
+            Template: The template of the resource.
+
+        Raises:
+            FileNotFoundError: If the resource does not exist.
+        """
+        if not cls._loaded:
+            cls.load()
+        try:
+            return cls._templates[name]
+        except KeyError:
+            raise FileNotFoundError(f"The resource '{name}' does not exist.")
+
+    @classmethod
+    def exists(cls, name: str) -> bool:
+        """
+        Checks whether a resource exists.
+
+        Args:
+            name (str): The name of the resource, relative to the resources directory.
+
+        Returns:
+            bool: True if the resource exists, False otherwise.
+        """
+        if not cls._loaded:
+            cls.load()
+        return name in cls._texts
+
+    @classmethod
+    def list_resources(cls, directory: str, extension: str) -> list[str]:
+        """
+        Lists the resources of a directory with the given extension.
+
+        Args:
+            directory (str): The directory, relative to the resources directory.
+            extension (str): The extension of the resources, e.g. '.css'.
+
+        Returns:
+            list[str]: The sorted names of the resources.
+        """
+        if not cls._loaded:
+            cls.load()
+        prefix = f'{directory}/'
+        return sorted(
+            name for name in cls._texts
+            if name.startswith(prefix) and '/' not in name[len(prefix):] and name.endswith(extension)
+        )
+
+    @classmethod
+    def watch(cls, interval: float):
+        """
+        Starts polling the resources directory in a background thread, reloading changed files.
+
+        Args:
+            interval (float): The delay between two checks, in seconds.
+        """
+        if cls._watcher is not None:
+            return
+        cls._stop.clear()
+
+        def run():
+            while not cls._stop.wait(interval):
+                try:
+                    changed = cls.reload_changed()
+                    if changed:
+                        logger.info(f'Reloaded resources: {", ".join(sorted(changed))}')
+                except Exception as e:
+                    logger.error(f'Could not reload resources: {e}')
+
+        cls._watcher = threading.Thread(target=run, name='resources-watcher', daemon=True)
+        cls._watcher.start()
+
+    @classmethod
+    def stop_watching(cls):
+        """
+        Stops polling the resources directory.
+        """
+        if cls._watcher is None:
+            return
+        cls._stop.set()
+        cls._watcher.join()
+        cls._watcher = None
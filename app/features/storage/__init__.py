@@ -0,0 +1,162 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional, Union
+
+from app.domain.model.presentation import Presentation
+from app.domain.model.slides import Slide
+
+
+@dataclass(frozen=True)
+class PresentationStat:
+    """
+    Represents the storage information of a presentation.
+
+    Attributes:
+        version (Any): A token that changes whenever the stored presentation changes.
+        size (int): The estimated size of the stored presentation, in bytes.
+        revision (int): The version number of the presentation, when the store knows it without loading it.
+    """
+    version: Any
+    size: int
+    revision: Optional[int] = None
+
+
+class PresentationStore(ABC):
+    """
+    Interface of the presentation persistence backends.
+
+    Every read and write of a presentation goes through a store, so the backend can be
+    changed without touching the rest of the application.
+    """
+
+    @abstractmethod
+    async def stat(self, id: str) -> Union[PresentationStat, None]:
+        """
+        Returns the storage information of a presentation.
+
+        Args:
+            id (str): The ID of the presentation.
+
+        Returns:
+            PresentationStat | None: The version and size of the presentation, or None if it does not exist.
+        """
+
+    @abstractmethod
+    async def load(self, id: str) -> Union[Presentation, None]:
+        """
+        Loads a presentation.
+
+        Args:
+            id (str): The ID of the presentation.
+
+        Returns:
+            Presentation | None: The presentation, or None if it does not exist.
+        """
+
+    async def load_slide(self, id: str, sid: str) -> Union[Slide, None]:
+        """
+        Loads a single slide of a presentation.
+
+        The default implementation loads the whole presentation.
+
+        Args:
+            id (str): The ID of the presentation.
+            sid (str): The ID of the slide.
+
+        Returns:
+            Slide | None: The slide, or None if it does not exist.
+        """
+        presentation = await self.load(id)
+        if presentation is None:
+            return None
+        return next((s for s in presentation.slides if s.id == sid), None)
+
+    @abstractmethod
+    async def save(self, presentation: Presentation):
+        """
+        Saves a presentation, replacing any previous version.
+
+        Args:
+            presentation (Presentation): The presentation to save.
+        """
+
+    async def save_changes(self, presentation: Presentation, changes: list[dict]):
+        """
+        Saves a presentation that was updated by applying changes to its stored version.
+
+        Stores able to record the changes alone can do so. The default implementation saves the
+        whole presentation.
+
+        Args:
+            presentation (Presentation): The updated presentation.
+            changes (list[dict]): The changes applied to the stored version.
+        """
+        await self.save(presentation)
+
+    @abstractmethod
+    async def delete(self, id: str):
+        """
+        Deletes a presentation.
+
+        Args:
+            id (str): The ID of the presentation.
+        """
+
+    @abstractmethod
+    async def list_presentations(self) -> list[dict]:
+        """
+        Lists the stored presentations, sorted by title.
+
+        Returns:
+            list[dict]: The id, title, slide count, modification time and size of each presentation.
+        """
+
+
+class StoreType(str, Enum):
+    """
+    Enumeration of available presentation stores.
+    Each store type has a corresponding class implementing the PresentationStore interface.
+    """
+    FILE = 'file'
+    SQLITE = 'sqlite'
+
+    def new_instance(self, config_dir: str, presentations_dir: str) -> PresentationStore:
+        """
+        Creates a new instance of the corresponding store class.
+
+        Args:
+            config_dir (str): The configuration directory of the application.
+            presentations_dir (str): The directory where presentation files are stored.
+
+        Returns:
+            PresentationStore: An instance of the corresponding store class.
+        """
+        match self:
+            case StoreType.FILE:
+                from app.features.storage.file_store import FilePresentationStore
+                return FilePresentationStore(presentations_dir)
+            case StoreType.SQLITE:
+                from app.features.storage.sqlite_store import SQLitePresentationStore
+                return SQLitePresentationStore(os.path.join(config_dir, 'presentations.sqlite3'), import_dir=presentations_dir)
+            case _:
+                raise ValueError(f'Unknown store: {self}')
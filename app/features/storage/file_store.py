@@ -0,0 +1,266 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Union
+from uuid import NAMESPACE_URL, uuid5
+
+from app.domain.model.presentation import Presentation
+from app.features.index import PresentationIndex
+from app.features.storage import PresentationStore, PresentationStat
+from app.utils.config import get_setting
+from app.utils.files import atomic_write, FsyncBatcher
+from app.utils.logger import logger
+
+
+def _stamp_instances(id: str, entry: dict):
+    """
+    Gives the template and transition changes of a journal entry recorded without the ID of the
+    instance they created a fixed one, derived from the entry, so replaying it always gives the
+    same slides.
+    """
+    for position, change in enumerate(entry['changes']):
+        if change.get('field') != 'slide':
+            continue
+        for field in change['value']:
+            if field['field'] in ('template', 'transition') and isinstance(field['value'], dict):
+                name = f'{id}/{entry["version"]}/{position}/{change["id"]}/{field["field"]}'
+                field['value'].setdefault('instance_id', str(uuid5(NAMESPACE_URL, name)))
+
+
+class FilePresentationStore(PresentationStore):
+    """
+    Presentation store keeping each presentation in its own JSON file.
+
+    The presentation list is served from the presentations index, kept up to date on every save.
+
+    Saves run in a worker thread and replace the file atomically. The 'fsync' setting controls
+    durability: 'always' flushes every save to disk before returning, 'batch' groups the flushes
+    of the saves made within 'fsync_interval' seconds, and 'never' leaves it to the OS.
+
+    Changes saved through save_changes are appended to a per-presentation journal instead of
+    rewriting the file. Loading replays the journal entries newer than the snapshot, and the
+    journal is compacted into a new snapshot in the background once it holds more than
+    'journal_max_entries' entries or 'journal_max_size' bytes.
+    """
+
+    def __init__(self, presentations_dir: str):
+        self.presentations_dir = presentations_dir
+        self.index = PresentationIndex.for_dir(presentations_dir, read=self._summary)
+        self.fsync = get_setting('fsync', 'always')
+        self.journal_max_entries = int(get_setting('journal_max_entries', 200))
+        self.journal_max_size = int(get_setting('journal_max_size', 1024 * 1024))
+        self._batcher = FsyncBatcher(float(get_setting('fsync_interval', 1.0))) if self.fsync == 'batch' else None
+        self._locks: dict[str, threading.Lock] = {}
+        self._journal_entries: dict[str, int] = {}
+        self._snapshot_versions: dict[str, int] = {}
+        self._compactions: dict[str, asyncio.Task] = {}
+
+    def _path(self, id: str) -> str:
+        return os.path.join(self.presentations_dir, f'{id}.json')
+
+    def _journal_path(self, id: str) -> str:
+        return os.path.join(self.presentations_dir, f'{id}.journal')
+
+    def _lock(self, id: str) -> threading.Lock:
+        return self._locks.setdefault(id, threading.Lock())
+
+    def _sync(self, path: str, fd: int):
+        """
+        Flushes a written file to disk according to the 'fsync' setting.
+        """
+        if self.fsync == 'always':
+            os.fsync(fd)
+        elif self._batcher is not None:
+            self._batcher.add(path)
+
+    async def stat(self, id: str) -> Union[PresentationStat, None]:
+        """
+        Returns the modification time and size of the presentation file, and the size of its
+        journal, as its version.
+        """
+        try:
+            stat = os.stat(self._path(id))
+        except FileNotFoundError:
+            return None
+        try:
+            journal_size = os.stat(self._journal_path(id)).st_size
+        except FileNotFoundError:
+            journal_size = 0
+        return PresentationStat(
+            version=(stat.st_mtime_ns, stat.st_size, journal_size),
+            size=stat.st_size + journal_size
+        )
+
+    async def load(self, id: str) -> Union[Presentation, None]:
+        return await asyncio.to_thread(self._read, id)
+
+    def _read(self, id: str) -> Union[Presentation, None]:
+        if not os.path.exists(self._path(id)):
+            return None
+        with self._lock(id):
+            with open(self._path(id), 'r') as file:
+                content = file.read()
+            lines = []
+            if os.path.exists(self._journal_path(id)):
+                with open(self._journal_path(id), 'r') as journal:
+                    lines = journal.readlines()
+        presentation = Presentation.from_json(content)
+        entries = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.error(f'Skipping truncated journal entry of presentation {id}')
+                continue
+            entries += 1
+            if entry['version'] <= presentation.version:
+                continue
+            try:
+                _stamp_instances(id, entry)
+                presentation.apply_changes(entry['changes'])
+            except Exception as e:
+                logger.error(f'Could not replay journal entry {entry["version"]} of presentation {id}: {e}')
+            presentation.version = entry['version']
+        self._journal_entries[id] = entries
+        return presentation
+
+    def _summary(self, id: str) -> Union[tuple[str, int], None]:
+        """
+        Returns the title and slide count of a presentation, journaled changes included, for the index.
+        """
+        try:
+            presentation = self._read(id)
+        except (OSError, ValueError):
+            return None
+        return None if presentation is None else (presentation.title, len(presentation.slides))
+
+    async def save(self, presentation: Presentation):
+        await asyncio.to_thread(self._write, presentation)
+
+    def _write(self, presentation: Presentation):
+        path = self._path(presentation.id)
+        content = presentation.to_json()
+        with self._lock(presentation.id):
+            if presentation.version < self._snapshot_versions.get(presentation.id, 0):
+                return
+            atomic_write(path, content, fsync=self.fsync == 'always')
+            self._snapshot_versions[presentation.id] = presentation.version
+            if self._batcher is not None:
+                self._batcher.add(path)
+            self._trim_journal(presentation.id, presentation.version)
+        self.index.update(presentation.id, presentation.title, len(presentation.slides))
+
+    def _trim_journal(self, id: str, version: int):
+        """
+        Removes the journal entries included in the snapshot of the given version.
+        """
+        journal_path = self._journal_path(id)
+        if not os.path.exists(journal_path):
+            self._journal_entries[id] = 0
+            return
+        lines = []
+        with open(journal_path, 'r') as journal:
+            for line in journal:
+                try:
+                    if json.loads(line)['version'] > version:
+                        lines.append(line)
+                except json.JSONDecodeError:
+                    if line.strip():
+                        logger.error(f'Dropping truncated journal entry of presentation {id}')
+        if lines:
+            atomic_write(journal_path, ''.join(lines), fsync=self.fsync == 'always')
+        else:
+            os.remove(journal_path)
+        self._journal_entries[id] = len(lines)
+
+    async def save_changes(self, presentation: Presentation, changes: list[dict]):
+        """
+        Appends the changes to the journal of the presentation, or saves it whole if it has no snapshot yet.
+        """
+        if not os.path.exists(self._path(presentation.id)):
+            await self.save(presentation)
+            return
+        journal_size = await asyncio.to_thread(self._append, presentation, changes)
+        entries = self._journal_entries.get(presentation.id, 0)
+        if entries > self.journal_max_entries or journal_size > self.journal_max_size:
+            self._compact(presentation)
+
+    def _append(self, presentation: Presentation, changes: list[dict]) -> int:
+        """
+        Appends a journal entry and returns the size of the journal.
+        """
+        journal_path = self._journal_path(presentation.id)
+        line = json.dumps({'version': presentation.version, 'changes': changes}) + '\n'
+        with self._lock(presentation.id):
+            if os.path.exists(journal_path):
+                self._cut_partial_entry(presentation.id, journal_path)
+            if presentation.id not in self._journal_entries and os.path.exists(journal_path):
+                with open(journal_path, 'r') as journal:
+                    self._journal_entries[presentation.id] = sum(1 for _ in journal)
+            with open(journal_path, 'a') as journal:
+                journal.write(line)
+                journal.flush()
+                self._sync(journal_path, journal.fileno())
+                journal_size = journal.tell()
+            self._journal_entries[presentation.id] = self._journal_entries.get(presentation.id, 0) + 1
+        self.index.update(presentation.id, presentation.title, len(presentation.slides))
+        return journal_size
+
+    @staticmethod
+    def _cut_partial_entry(id: str, journal_path: str):
+        """
+        Removes the last entry of a journal if a crash cut it off before its end, so the next entry
+        starts on its own line.
+        """
+        with open(journal_path, 'rb+') as journal:
+            size = journal.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            journal.seek(size - 1)
+            if journal.read(1) == b'\n':
+                return
+            journal.seek(0)
+            end = journal.read().rfind(b'\n') + 1
+            journal.truncate(end)
+        logger.error(f'Dropping truncated journal entry of presentation {id}')
+
+    def _compact(self, presentation: Presentation):
+        """
+        Writes a new snapshot of the presentation in the background, trimming its journal.
+        """
+        if presentation.id in self._compactions:
+            return
+        task = asyncio.get_running_loop().create_task(self.save(presentation))
+        self._compactions[presentation.id] = task
+        task.add_done_callback(lambda _: self._compactions.pop(presentation.id, None))
+
+    async def delete(self, id: str):
+        with self._lock(id):
+            for path in (self._path(id), self._journal_path(id)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_entries.pop(id, None)
+            self._snapshot_versions.pop(id, None)
+        self.index.remove(id)
+
+    async def list_presentations(self) -> list[dict]:
+        return await asyncio.to_thread(self.index.entries)
@@ -0,0 +1,211 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Union
+
+from app.domain.model.presentation import Presentation
+from app.domain.model.slides import Slide
+from app.features.storage import PresentationStore, PresentationStat
+from app.features.storage.file_store import FilePresentationStore
+from app.utils.errors import VersionConflictError
+from app.utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presentations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    slides INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presentations_title ON presentations (title COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS slides (
+    presentation_id TEXT NOT NULL REFERENCES presentations (id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (presentation_id, id)
+);
+CREATE INDEX IF NOT EXISTS slides_position ON slides (presentation_id, position);
+"""
+
+
+class SQLitePresentationStore(PresentationStore):
+    """
+    Presentation store backed by a SQLite database in WAL mode.
+
+    Presentations and their slides are stored as rows, slides holding their JSON data. Media files
+    are kept as references to the media store. A save runs in a single transaction and only
+    rewrites the slides that changed.
+
+    The version column holds the version of the presentation. A save is rejected with a
+    VersionConflictError unless it carries a newer version than the stored one, so concurrent
+    writers, even from other processes, cannot overwrite each other's changes.
+
+    Queries run in a worker thread so they do not block the event loop.
+
+    When the database is created, the presentations of the file store are imported into it, so
+    switching from the file store keeps them. This is only done once: the presentation files are
+    left untouched, and later changes to them are not imported.
+    """
+
+    def __init__(self, db_path: str, import_dir: Union[str, None] = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('PRAGMA foreign_keys=ON')
+        self._connection.executescript(SCHEMA)
+        if import_dir is not None:
+            self._import(import_dir)
+
+    def _import(self, presentations_dir: str):
+        """
+        Imports the presentations of a file store directory into a new database, journaled changes
+        included. The database user version records that the import was done.
+        """
+        if self._connection.execute('PRAGMA user_version').fetchone()[0] > 0:
+            return
+        if self._connection.execute('SELECT COUNT(*) FROM presentations').fetchone()[0] == 0 \
+                and os.path.isdir(presentations_dir):
+            files = FilePresentationStore(presentations_dir)
+            imported = 0
+            for name in sorted(os.listdir(presentations_dir)):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    presentation = files._read(name[:-len('.json')])
+                except (OSError, ValueError) as e:
+                    logger.error(f'Could not import presentation file {name}: {e}')
+                    continue
+                if presentation is not None:
+                    self._write(presentation)
+                    imported += 1
+            if imported:
+                logger.info(f'Imported {imported} presentations from {presentations_dir}')
+        self._connection.execute('PRAGMA user_version = 1')
+
+    async def _run(self, fn, *args):
+        """
+        Runs a database function in a worker thread, holding the connection lock.
+        """
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def stat(self, id: str) -> Union[PresentationStat, None]:
+        def query():
+            return self._connection.execute(
+                'SELECT version, size FROM presentations WHERE id = ?', (id,)
+            ).fetchone()
+        row = await self._run(query)
+        return PresentationStat(version=row[0], size=row[1], revision=row[0]) if row else None
+
+    async def load(self, id: str) -> Union[Presentation, None]:
+        def query():
+            row = self._connection.execute('SELECT data, version FROM presentations WHERE id = ?', (id,)).fetchone()
+            if row is None:
+                return None
+            slides = self._connection.execute(
+                'SELECT data FROM slides WHERE presentation_id = ? ORDER BY position', (id,)
+            ).fetchall()
+            return row, [slide[0] for slide in slides]
+        result = await self._run(query)
+        if result is None:
+            return None
+        d = json.loads(result[0][0])
+        d['version'] = result[0][1]
+        d['slides'] = [json.loads(slide) for slide in result[1]]
+        return Presentation.from_dict(d)
+
+    async def load_slide(self, id: str, sid: str) -> Union[Slide, None]:
+        def query():
+            return self._connection.execute(
+                'SELECT data FROM slides WHERE presentation_id = ? AND id = ?', (id, sid)
+            ).fetchone()
+        row = await self._run(query)
+        return Slide.from_dict(json.loads(row[0])) if row else None
+
+    async def save(self, presentation: Presentation):
+        await self._run(self._write, presentation)
+
+    def _write(self, presentation: Presentation):
+        """
+        Saves a presentation in a single transaction, unless the stored one is as recent.
+        """
+        d = presentation.to_dict(encode_json=True)
+        slides = [(presentation.id, s['id'], s['position'], json.dumps(s)) for s in d.pop('slides')]
+        data = json.dumps(d)
+        size = len(data) + sum(len(slide[3]) for slide in slides)
+        cursor = self._connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute(
+                'INSERT INTO presentations (id, title, slides, size, version, updated_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET title = excluded.title, slides = excluded.slides, '
+                'size = excluded.size, version = excluded.version, updated_at = excluded.updated_at, '
+                'data = excluded.data WHERE presentations.version < excluded.version',
+                (presentation.id, presentation.title, len(slides), size, presentation.version, time.time_ns(), data)
+            )
+            if cursor.rowcount == 0:
+                version = cursor.execute(
+                    'SELECT version FROM presentations WHERE id = ?', (presentation.id,)
+                ).fetchone()[0]
+                raise VersionConflictError(version=version)
+            slide_ids = [slide[1] for slide in slides]
+            cursor.execute(
+                f'DELETE FROM slides WHERE presentation_id = ? AND id NOT IN ({", ".join("?" * len(slide_ids))})',
+                (presentation.id, *slide_ids)
+            )
+            cursor.executemany(
+                'INSERT INTO slides (presentation_id, id, position, data) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (presentation_id, id) DO UPDATE SET position = excluded.position, data = excluded.data '
+                'WHERE slides.position != excluded.position OR slides.data != excluded.data',
+                slides
+            )
+            cursor.execute('COMMIT')
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+
+    async def delete(self, id: str):
+        def query():
+            self._connection.execute('DELETE FROM presentations WHERE id = ?', (id,))
+        await self._run(query)
+
+    async def list_presentations(self) -> list[dict]:
+        def query():
+            return self._connection.execute(
+                'SELECT id, title, slides, updated_at, size FROM presentations ORDER BY title COLLATE NOCASE, id'
+            ).fetchall()
+        rows = await self._run(query)
+        return [
+            {'id': row[0], 'title': row[1], 'slides': row[2], 'mtime': row[3], 'size': row[4]}
+            for row in rows
+        ]
@@ -0,0 +1,195 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from typing import Optional, Union
+
+from app.domain.model.presentation import Presentation
+from app.domain.model.slides import Slide
+from app.features.storage import PresentationStore, PresentationStat
+from app.utils.errors import VersionConflictError
+from app.utils.logger import logger
+
+
+class WriteBehindStore(PresentationStore):
+    """
+    Presentation store coalescing the writes made to another store.
+
+    A saved presentation becomes the authoritative in-memory copy right away, and is written to
+    the underlying store at most `interval` seconds after its first unflushed change. All the saves
+    made in between are coalesced into a single write. Changes saved through save_changes are
+    queued, and written together in a single save_changes call to the underlying store, unless a
+    whole presentation was saved in between. The store takes ownership of the saved presentations:
+    callers must not modify them afterward.
+
+    Pending presentations are flushed on shutdown and on explicit request. A pending write rejected
+    by the underlying store as a version conflict is discarded.
+
+    Attributes:
+        backend (PresentationStore): The store the presentations are written to.
+        interval (float): The maximum delay before a change is written, in seconds.
+        saves (int): The number of saves received.
+        flushes (int): The number of writes made to the underlying store.
+    """
+
+    def __init__(self, backend: PresentationStore, interval: float):
+        self.backend = backend
+        self.interval = interval
+        self.saves = 0
+        self.flushes = 0
+        self._dirty: dict[str, Presentation] = {}
+        self._changes: dict[str, Optional[list[dict]]] = {}
+        self._sizes: dict[str, int] = {}
+        self._versions: dict[str, int] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _schedule(self, id: str):
+        """
+        Schedules the flush of a presentation, unless one is already scheduled.
+        """
+        if id in self._timers:
+            return
+        loop = asyncio.get_running_loop()
+
+        def start_flush():
+            task = loop.create_task(self.flush(id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._timers[id] = loop.call_later(self.interval, start_flush)
+
+    async def stat(self, id: str) -> Union[PresentationStat, None]:
+        if id in self._dirty:
+            return PresentationStat(
+                version=('dirty', self._versions[id]),
+                size=self._sizes[id],
+                revision=self._dirty[id].version
+            )
+        return await self.backend.stat(id)
+
+    async def load(self, id: str) -> Union[Presentation, None]:
+        if id in self._dirty:
+            return self._dirty[id]
+        return await self.backend.load(id)
+
+    async def load_slide(self, id: str, sid: str) -> Union[Slide, None]:
+        if id in self._dirty:
+            return next((s for s in self._dirty[id].slides if s.id == sid), None)
+        return await self.backend.load_slide(id, sid)
+
+    def _mark_dirty(self, presentation: Presentation):
+        """
+        Makes a saved presentation the pending version and schedules its flush.
+
+        The size of the presentation is measured once here, for stat to report it.
+        """
+        self.saves += 1
+        self._sizes[presentation.id] = len(presentation.to_json())
+        self._dirty[presentation.id] = presentation
+        self._versions[presentation.id] = self._versions.get(presentation.id, 0) + 1
+        self._schedule(presentation.id)
+
+    async def save(self, presentation: Presentation):
+        self._changes[presentation.id] = None
+        self._mark_dirty(presentation)
+
+    async def save_changes(self, presentation: Presentation, changes: list[dict]):
+        """
+        Queues the changes, to be written with the other changes pending for the presentation.
+        A pending whole save of the presentation includes them already.
+        """
+        if presentation.id not in self._changes:
+            self._changes[presentation.id] = list(changes)
+        elif self._changes[presentation.id] is not None:
+            self._changes[presentation.id].extend(changes)
+        self._mark_dirty(presentation)
+
+    async def flush(self, id: str):
+        """
+        Writes the pending changes of a presentation to the underlying store.
+
+        Args:
+            id (str): The ID of the presentation.
+        """
+        timer = self._timers.pop(id, None)
+        if timer is not None:
+            timer.cancel()
+        lock = self._locks.setdefault(id, asyncio.Lock())
+        async with lock:
+            presentation = self._dirty.get(id)
+            if presentation is None:
+                return
+            changes = self._changes.pop(id, None)
+            try:
+                if changes is None:
+                    await self.backend.save(presentation)
+                else:
+                    await self.backend.save_changes(presentation, changes)
+            except VersionConflictError as e:
+                logger.error(f'Discarding pending changes of presentation {id}: {e}')
+                if self._dirty.get(id) is presentation:
+                    del self._dirty[id]
+                    del self._sizes[id]
+                return
+            except Exception as e:
+                logger.error(f'Could not write presentation {id}: {e}')
+                pending = self._changes.get(id, [])
+                self._changes[id] = None if changes is None or pending is None else changes + pending
+                self._schedule(id)
+                return
+            self.flushes += 1
+            if self._dirty.get(id) is presentation:
+                del self._dirty[id]
+                del self._sizes[id]
+
+    async def flush_all(self):
+        """
+        Writes the pending changes of all the presentations to the underlying store.
+        """
+        for id in list(self._dirty):
+            await self.flush(id)
+
+    async def delete(self, id: str):
+        timer = self._timers.pop(id, None)
+        if timer is not None:
+            timer.cancel()
+        self._dirty.pop(id, None)
+        self._changes.pop(id, None)
+        self._sizes.pop(id, None)
+        await self.backend.delete(id)
+
+    async def list_presentations(self) -> list[dict]:
+        entries = {entry['id']: entry for entry in await self.backend.list_presentations()}
+        for id, presentation in self._dirty.items():
+            entry = entries.get(id, {'id': id, 'mtime': 0, 'size': 0})
+            entries[id] = dict(entry, title=presentation.title, slides=len(presentation.slides))
+        return sorted(entries.values(), key=lambda e: (e['title'].casefold(), e['id']))
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the store.
+
+        Returns:
+            dict: The number of saves received, writes made and presentations pending.
+        """
+        return {
+            'saves': self.saves,
+            'flushes': self.flushes,
+            'pending': len(self._dirty),
+        }
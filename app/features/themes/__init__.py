@@ -1,9 +1,8 @@
 import os
-from pathlib import Path
 
 from app.domain.model import Record, ThemeRecords
+from app.features.resources import Resources
 from app.utils.decorators import classproperty
-from app.utils.files import list_files
 
 
 class Themes:
@@ -16,12 +15,12 @@ class Themes:
         Returns:
             str: The path to the themes' directory.
         """
-        return os.path.join(Path.cwd(), 'res', 'themes')
+        return os.path.join(Resources.resources_path, 'themes')
 
     @classmethod
     async def list_themes(cls) -> ThemeRecords:
         records = []
-        files = list_files(cls.themes_path, ['.css'])
+        files = Resources.list_resources('themes', '.css')
         for file in files:
             file_id = file.split('/')[-1].split('.')[0]
             file_name = ' '.join([word.capitalize() for word in file_id.split('_')])
@@ -30,9 +29,7 @@ class Themes:
 
     @classmethod
     async def get_theme(cls, name: str) -> str:
-        if not os.path.exists(os.path.join(cls.themes_path, f'{name}.css')):
+        if not Resources.exists(f'themes/{name}.css'):
             raise FileNotFoundError(f"The theme '{name}' does not exist.")
-        with open(os.path.join(cls.themes_path, f'{name}.css'), 'r') as theme_file:
-            theme = theme_file.read()
-        return theme
+        return Resources.get(f'themes/{name}.css')
 
@@ -0,0 +1,592 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import os.path
+from contextlib import asynccontextmanager
+from string import Template
+from typing import AsyncIterator, Optional, Union
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import HTMLResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+from .domain.model import TemplateRecords, TransitionRecords, PresentationRecords, ErrorResponse, ThemeRecords, \
+    FXRecords
+from .domain.api.edit_presentation import edit_presentation
+from .domain.api.presentation import remove_slide_from_presentation, get_presentation, add_slide_to_presentation, \
+    get_slide, render_presentation, export_presentation
+from .domain.api.presentations import get_presentations
+from .domain.api.root import get_root
+from .domain.api.store_presentation import store_presentation, save_presentation_changes, presentation_cache, \
+    presentation_lock, version_etag, version_matches, render_cache
+from .domain.api.templates import get_templates
+from .domain.api.transitions import get_transitions
+from .domain.model.file import MediaReference
+from .domain.model.fx import FXResponse, FXTargetType
+from .domain.model.presentation import PresentationResponse
+from .domain.model.slides import SlideResponse, fragment_cache
+from .domain.model.transitions import compile_scss
+from .domain.model.transitions.transitions import Transitions
+from .features.media import MediaStore
+from .features.bundles import Bundles
+from .features.rendering import RenderPool, SlideRenderer
+from .features.resources import Resources
+from .features.storage import StoreType
+from .features.storage.write_behind import WriteBehindStore
+from .features.themes import Themes
+from .utils.config import config_dir, presentations_dir, get_setting, resources_dir
+from .utils.errors import EmptyMediaError, MediaTooLargeError, VersionConflictError, RenderPoolBusyError, \
+    RenderTimeoutError, UnsupportedFileTypeError
+from .utils.compression import CompressionMiddleware, encoded_etag, etag_matches, negotiate
+from .utils.logger import logger
+from .utils.markdown_renderer import markdown_cache
+from .utils.minifier import minify_enabled, minify_html
+
+"""
+This module defines the FastAPI application for the PyGenPres project.
+"""
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    Resources.load()
+    await asyncio.to_thread(SlideRenderer.start)
+    if float(get_setting('resources_reload_interval', 0)) > 0:
+        Resources.watch(float(get_setting('resources_reload_interval', 0)))
+    warm_up = None
+    if get_setting('sass_warm_up', False):
+        warm_up = asyncio.create_task(asyncio.to_thread(Transitions.warm_up))
+    yield
+    if warm_up is not None:
+        await warm_up
+    Resources.stop_watching()
+    RenderPool.shutdown()
+    SlideRenderer.shutdown()
+    if isinstance(store, WriteBehindStore):
+        await store.flush_all()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(get_setting('compression_min_size', 1024)),
+    level=int(get_setting('compression_level', 5))
+)
+store = StoreType(get_setting('storage', StoreType.FILE)).new_instance(config_dir, presentations_dir)
+if float(get_setting('write_behind_interval', 2.0)) > 0:
+    store = WriteBehindStore(store, interval=float(get_setting('write_behind_interval', 2.0)))
+
+
+def version_conflict(status_code: int, version: Optional[int]) -> JSONResponse:
+    """
+    Returns the response to a change request made against an outdated version of a presentation.
+
+    Args:
+        status_code: 412 when the If-Match header does not match, 409 when the store rejected the write.
+        version: The current version of the presentation, if known.
+    """
+    headers = {'ETag': version_etag(version)} if version is not None else None
+    return JSONResponse(
+        status_code=status_code,
+        content={'message': 'Presentation was modified concurrently, reload it and try again'},
+        headers=headers
+    )
+
+
+def render_unavailable(error: Union[RenderPoolBusyError, RenderTimeoutError]) -> JSONResponse:
+    """
+    Returns the response to a render that could not be done.
+
+    Args:
+        error: RenderPoolBusyError when the render pool is saturated (503), RenderTimeoutError when
+            the render took too long (504).
+    """
+    if isinstance(error, RenderPoolBusyError):
+        return JSONResponse(
+            status_code=503,
+            content={'message': 'Server is busy rendering, try again later'},
+            headers={'Retry-After': str(error.retry_after)}
+        )
+    return JSONResponse(status_code=504, content={'message': 'Rendering took too long'})
+
+
+async def abort_on_error(id: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Streams the chunks of a rendered document, aborting the response if the render fails.
+
+    The status of a streamed response is sent with its first chunk, so a render failing after it,
+    for instance when the render timeout passes, cannot be answered with an error anymore. The error
+    is raised to the server instead, which drops the connection rather than ending the response, so
+    the client never takes the partial document for a complete one.
+
+    Args:
+        id: The ID of the presentation.
+        chunks: The chunks of the document.
+    """
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        logger.error(f'Aborting the response of presentation {id}: {e}')
+        raise
+
+
+@app.get("/", response_class=HTMLResponse, include_in_schema=False)
+async def root():
+    """
+    Returns the root HTML page.
+    """
+    return await get_root()
+
+
+@app.get("/p", response_model=PresentationRecords)
+async def presentations():
+    """
+    Returns a list of available presentations.
+    """
+    return await get_presentations(store)
+
+
+@app.get("/t", response_model=TemplateRecords)
+async def templates():
+    """
+    Returns a list of available templates.
+    """
+    return await get_templates()
+
+
+@app.get("/tr", response_model=TransitionRecords)
+async def transitions():
+    """
+    Returns a list of available transitions.
+    """
+    return await get_transitions()
+
+
+@app.get("/th", response_model=ThemeRecords)
+async def themes():
+    """
+    Returns a list of available themes.
+    """
+    return await Themes.list_themes()
+
+
+@app.get("/fx", response_model=FXRecords)
+async def fx(target: FXTargetType = None):
+    """
+    Returns a list of available effects.
+    Args:
+        target: The target type of the effects (optional).
+    """
+    return await FXResponse.list_fx(target_type=target)
+
+
+@app.get("/p/{id}.html", response_class=HTMLResponse, include_in_schema=False)
+async def run(id: str, request: Request, export: bool = False):
+    """
+    Returns the HTML representation of a presentation.
+
+    The rendered document is cached and sent with a strong ETag, specific to its content coding, so
+    browsers reloading an unchanged presentation get a 304 response. A document that is not cached is streamed while it is rendered,
+    once the render pool accepted it, and the connection is dropped if the render fails midway.
+
+    Args:
+        id: The ID of the presentation.
+        export: Whether to return a self-contained document, with the images and videos inlined once each.
+    """
+    if export:
+        try:
+            html = await export_presentation(id, store, minify=minify_enabled('export'))
+        except (RenderPoolBusyError, RenderTimeoutError) as e:
+            return render_unavailable(e)
+        if html is None:
+            raise HTTPException(status_code=400, detail='Presentation not found')
+        return HTMLResponse(html)
+    try:
+        rendered = await render_presentation(id, store, minify=minify_enabled('presentation'))
+    except (RenderPoolBusyError, RenderTimeoutError) as e:
+        return render_unavailable(e)
+    if not rendered:
+        raise HTTPException(status_code=400, detail='Presentation not found')
+
+    etag, html, encoded = rendered
+    etag = f'"{etag}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    encoding = negotiate(request.headers.get('accept-encoding', ''))
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        if not isinstance(html, str):
+            await html.aclose()
+        headers.update({'ETag': encoded_etag(etag, encoding), 'Vary': 'Accept-Encoding'})
+        return Response(status_code=304, headers=headers)
+    if isinstance(html, str):
+        if encoding in encoded:
+            headers.update({'ETag': encoded_etag(etag, encoding), 'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'})
+            return Response(encoded[encoding], media_type='text/html; charset=utf-8', headers=headers)
+        return HTMLResponse(html, headers=headers)
+    return StreamingResponse(abort_on_error(id, html), media_type='text/html; charset=utf-8', headers=headers)
+
+
+@app.get("/p/{id}.json", response_model=PresentationResponse)
+async def get_json_presentation(id: str, request: Request, response: Response):
+    """
+    Returns the JSON representation of a presentation.
+
+    The version of the presentation is returned as the ETag, to be sent back in the If-Match
+    header of the requests changing it.
+
+    Args:
+        id: The ID of the presentation.
+    """
+    presentation = await get_presentation(id, store, copy=False)
+    if not presentation:
+        raise HTTPException(status_code=400, detail='Presentation not found')
+
+    etag = version_etag(presentation.version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return presentation.to_response()
+
+
+@app.get("/new", response_class=HTMLResponse, include_in_schema=False)
+async def new():
+    return await edit()
+
+
+@app.get("/s/{id}/{sid}.html", response_class=HTMLResponse, include_in_schema=False)
+async def get_html_slide(id: str, sid: str):
+    """
+    Returns the HTML representation of a specific slide.
+
+    Args:
+        id: The ID of the presentation.
+        sid: The ID of the slide.
+    """
+    presentation = await get_presentation(id, store, copy=False)
+    if not presentation:
+        raise HTTPException(status_code=400, detail='Presentation not found')
+
+    slide = [s for s in presentation.slides if s.id == sid][0]
+    animation_css = ''.join([Resources.get(name) for name in sorted(slide.animations)])
+    theme = '' if not slide.theme else await Themes.get_theme(slide.theme)
+    try:
+        fragments = (await SlideRenderer.render([slide], hidden=False))[0]
+    except (RenderPoolBusyError, RenderTimeoutError) as e:
+        return render_unavailable(e)
+    transition_css = await asyncio.to_thread(slide.transition.get)
+    content = f"""<style>{transition_css}
+{Template(fragments.style).safe_substitute({'font_family': presentation.font_family})}
+{slide.template.shared_style}
+footer {{
+    position: absolute;
+    z-index: 10;
+    bottom: 0;
+    left: 0;
+    right: 0;
+    padding: 4px 16px;
+    display: flex;
+    flex-direction: row;
+    justify-content: space-between;
+    color: #fff;
+    font-size: 0.7rem
+}}
+{theme}
+{animation_css}
+</style>
+{fragments.html}
+<footer>{Template(presentation.get_footer()).safe_substitute({'slide_position': slide.position + 1})}</footer>"""
+    return minify_html(content) if minify_enabled('slide') else content
+
+
+@app.get("/s/{id}/{sid}.json", response_model=SlideResponse)
+async def get_json_slide(id: str, sid: str, request: Request, response: Response):
+    """
+    Returns the JSON representation of a specific slide.
+
+    The version of the presentation is returned as the ETag.
+
+    Args:
+        id: The ID of the presentation.
+        sid: The ID of the slide.
+    """
+    slide, version = await get_slide(id, sid, store)
+    if not slide:
+        raise HTTPException(status_code=400, detail='Slide not found')
+
+    etag = version_etag(version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return slide.to_response()
+
+
+@app.get(
+    "/s/{id}/add",
+    response_model=PresentationResponse,
+    responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}, 412: {"model": ErrorResponse}},
+    status_code=201
+)
+async def add_slide(
+        id: str,
+        response: Response,
+        position: Union[int, None] = None,
+        if_match: Optional[str] = Header(default=None)
+):
+    """
+    Adds a new slide to a presentation.
+
+    Args:
+        id: The ID of the presentation.
+        position: The position where to insert the new slide.
+        if_match: The ETag of the version the change is based on (optional).
+    """
+    async with presentation_lock(id):
+        presentation = await get_presentation(id, store)
+        if not presentation:
+            raise HTTPException(status_code=400, detail='Presentation not found')
+        if not version_matches(if_match, presentation.version):
+            return version_conflict(412, presentation.version)
+        try:
+            result = await add_slide_to_presentation(presentation, position, store)
+        except VersionConflictError as e:
+            return version_conflict(409, e.version)
+
+    if result:
+        response.headers['ETag'] = version_etag(presentation.version)
+        return presentation.to_response()
+    return JSONResponse(status_code=400, content={'message': 'Could not add slide'})
+
+
+@app.delete(
+    "/s/{id}/{sid}.json",
+    response_model=PresentationResponse,
+    responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}, 412: {"model": ErrorResponse}}
+)
+async def remove_slide(id: str, sid: str, response: Response, if_match: Optional[str] = Header(default=None)):
+    """
+    Removes a slide from a presentation.
+
+    Args:
+        id: The ID of the presentation.
+        sid: The ID of the slide to remove.
+        if_match: The ETag of the version the change is based on (optional).
+    """
+    async with presentation_lock(id):
+        presentation = await get_presentation(id, store)
+        if not presentation:
+            raise HTTPException(status_code=400, detail='Presentation not found')
+        if not version_matches(if_match, presentation.version):
+            return version_conflict(412, presentation.version)
+        try:
+            result = await remove_slide_from_presentation(presentation, sid, store)
+        except VersionConflictError as e:
+            return version_conflict(409, e.version)
+
+    if result:
+        response.headers['ETag'] = version_etag(presentation.version)
+        return presentation.to_response()
+    return JSONResponse(status_code=400, content={'message': 'Could not delete slide'})
+
+
+@app.get("/edit/{id}", response_class=HTMLResponse, include_in_schema=False)
+async def edit(id: Union[str, None] = None):
+    """
+    Returns the HTML page for editing a presentation.
+
+    Args:
+        id: The ID of the presentation to edit.
+    """
+    return await edit_presentation(id=id, store=store)
+
+
+@app.post(
+    "/save",
+    response_model=PresentationResponse,
+    responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}, 412: {"model": ErrorResponse}}
+)
+async def save_presentation(changes: dict, response: Response, if_match: Optional[str] = Header(default=None)):
+    """
+    Saves changes made to a presentation.
+
+    When the If-Match header is given, the changes are only applied if the presentation is still
+    at that version, otherwise 412 is returned with the current version as the ETag.
+
+    Args:
+        if_match: The ETag of the version the changes are based on (optional).
+    """
+    try:
+        async with presentation_lock(changes['id']):
+            if if_match is not None:
+                current = await get_presentation(changes['id'], store, copy=False)
+                if not version_matches(if_match, current.version if current else None):
+                    return version_conflict(412, current.version if current else None)
+            presentation, applied = await save_presentation_changes(changes, store)
+            result = await store_presentation(presentation, store=store, changes=applied)
+        if result:
+            response.headers['ETag'] = version_etag(presentation.version)
+            return presentation.to_response()
+        return JSONResponse(status_code=400, content={'message': 'Could not save presentation'})
+    except VersionConflictError as e:
+        return version_conflict(409, e.version)
+    except Exception as e:
+        print(e)
+        return JSONResponse(status_code=400, content={'error': f'{e}'})
+
+
+@app.post("/flush", status_code=204)
+async def flush(id: Union[str, None] = None):
+    """
+    Writes the pending changes of a presentation, or of all presentations, to the store.
+
+    Args:
+        id: The ID of the presentation (optional).
+    """
+    if isinstance(store, WriteBehindStore):
+        if id is None:
+            await store.flush_all()
+        else:
+            await store.flush(id)
+
+
+@app.post(
+    "/media",
+    response_model=MediaReference,
+    responses={400: {"model": ErrorResponse}, 413: {"model": ErrorResponse}, 415: {"model": ErrorResponse}},
+    status_code=201
+)
+async def upload_media(request: Request, name: str = ''):
+    """
+    Uploads a media file to the media store.
+
+    The request body is the raw file content. It is streamed to disk chunk by chunk, so the memory
+    used does not depend on the file size. Only images and videos, as recognized from their first
+    bytes, are accepted. The returned reference can be attached to an image or video field of a
+    slide through /save.
+
+    Args:
+        name: The name of the uploaded file.
+    """
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > MediaStore.max_upload_size:
+        return JSONResponse(status_code=413, content={'message': f'{MediaTooLargeError(max_size=MediaStore.max_upload_size)}'})
+    try:
+        digest, size, media_type = await MediaStore.put_stream(
+            request.stream(),
+            media_type=request.headers.get('content-type')
+        )
+    except EmptyMediaError as e:
+        return JSONResponse(status_code=400, content={'message': f'{e}'})
+    except MediaTooLargeError as e:
+        return JSONResponse(status_code=413, content={'message': f'{e}'})
+    except UnsupportedFileTypeError as e:
+        return JSONResponse(status_code=415, content={'message': f'{e}'})
+    return MediaReference(type=media_type, name=name, size=size, hash=digest)
+
+
+@app.get("/media/{digest}", include_in_schema=False)
+async def media(digest: str, request: Request):
+    """
+    Returns a media file from the content-addressed media store.
+
+    Since a blob never changes once stored, it is served with a strong ETag and immutable caching.
+    Range requests are answered with 206 partial content, so videos can start playing and be seeked
+    without downloading the whole file.
+
+    Browsers are told not to sniff the type of the media, SVG images are sandboxed so their scripts
+    never run, and any file that is not an image or a video is only offered as a download.
+
+    Args:
+        digest: The SHA-256 digest of the media file.
+    """
+    if not MediaStore.exists(digest):
+        raise HTTPException(status_code=404, detail='Media not found')
+    etag = f'"{digest}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    media_type = MediaStore.media_type(digest) or 'application/octet-stream'
+    if media_type == 'image/svg+xml':
+        headers['Content-Security-Policy'] = 'sandbox'
+    elif not media_type.startswith(('image/', 'video/')):
+        media_type = 'application/octet-stream'
+        headers['Content-Disposition'] = 'attachment'
+    return FileResponse(MediaStore.blob_path(digest), media_type=media_type, headers=headers)
+
+
+@app.get("/static/bundles/{filename}", include_in_schema=False)
+async def bundle(filename: str, request: Request):
+    """
+    Returns a bundle of the styles or scripts shared by all presentations.
+
+    The file name of a bundle changes with its content, so it is served with immutable caching.
+
+    Args:
+        filename: The file name of the bundle.
+    """
+    await Bundles.build()
+    bundled = Bundles.get(filename)
+    if bundled is None:
+        raise HTTPException(status_code=404, detail='Bundle not found')
+    content, media_type, encoded = bundled
+    etag = f'"{filename}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+    }
+    encoding = negotiate(request.headers.get('accept-encoding', ''))
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        headers.update({'ETag': encoded_etag(etag, encoding if encoding in encoded else None), 'Vary': 'Accept-Encoding'})
+        return Response(status_code=304, headers=headers)
+    if encoding in encoded:
+        headers.update({'ETag': encoded_etag(etag, encoding), 'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'})
+        return Response(encoded[encoding], media_type=media_type, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Returns the counters of the application caches.
+    """
+    return {
+        'presentation_cache': presentation_cache.stats(),
+        'render_cache': render_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'markdown_cache': markdown_cache.stats(),
+        'sass_cache': compile_scss.cache_info()._asdict(),
+        'render_pool': RenderPool.stats(),
+        'write_behind': store.stats() if isinstance(store, WriteBehindStore) else None,
+    }
+
+
+@app.get("/favicon.ico", include_in_schema=False)
+async def favicon():
+    """
+    Returns the favicon.
+    """
+    return FileResponse(os.path.join(resources_dir, 'static', 'favicon.ico'))
+
+
+# mounted after the routes, so /static/bundles is not taken for a static file
+app.mount("/static", StaticFiles(directory=os.path.join(resources_dir, 'static')), name="static")
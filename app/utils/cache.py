@@ -0,0 +1,130 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache bounded by the estimated size of its entries.
+
+    Each entry can carry a version token: a lookup with a different version is treated as a miss
+    and drops the stale entry.
+
+    Attributes:
+        max_size (int): The maximum total size of the entries, in bytes.
+        hits (int): The number of successful lookups.
+        misses (int): The number of failed lookups.
+        evictions (int): The number of entries evicted to make room for new ones.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any = None, default: Any = None) -> Any:
+        """
+        Returns the value cached under the given key.
+
+        Args:
+            key (Hashable): The key of the entry.
+            version (Any): The expected version of the entry, if any.
+            default (Any): The value to return on a miss.
+
+        Returns:
+            Any: The cached value, or the default value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (version is not None and entry[0] != version):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, size: int, version: Any = None):
+        """
+        Caches a value, evicting the least recently used entries if needed.
+
+        Values larger than the whole cache are not stored.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+            size (int): The estimated size of the value, in bytes.
+            version (Any): The version of the value, if any.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_size:
+                return
+            while self._entries and self._size + size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (version, value, size)
+            self._size += size
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes the entry cached under the given key, if any.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """
+        Removes all the entries of the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict: The number of entries, their total size, and the hit, miss and eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,207 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+"""
+The media types worth compressing. Images, videos and fonts are already compressed, and compressing
+them would also break range requests.
+"""
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+"""
+The supported content codings, by order of preference. Brotli is used when the brotli package is installed.
+"""
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+"""
+The content codings which can be found in the ETags sent by the server, whatever the installed packages.
+"""
+ETAG_ENCODINGS = ('br', 'gzip')
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Chooses the content coding of a response from the Accept-Encoding header of the request.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header.
+
+    Returns:
+        Optional[str]: The preferred supported coding accepted by the client, or None to send the
+            response uncompressed.
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.partition(';')
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 0.0
+        accepted[coding.strip()] = quality
+    coding = max(ENCODINGS, key=lambda coding: accepted.get(coding, accepted.get('*', 0.0)))
+    return coding if accepted.get(coding, accepted.get('*', 0.0)) > 0 else None
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    Returns the ETag of a representation sent with a content coding.
+
+    Each coding of a representation is a different representation, so it gets its own strong ETag:
+    the coding is appended to the opaque tag, e.g. '"<hash>-br"'.
+
+    Args:
+        etag (str): The quoted ETag of the uncompressed representation.
+        encoding (Optional[str]): The content coding, None for the uncompressed representation.
+
+    Returns:
+        str: The quoted ETag of the representation with the content coding.
+    """
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match or If-Match header against the ETag of a representation, whatever the
+    content coding it was sent with.
+
+    Args:
+        header (Optional[str]): The value of the header, None if the request has none.
+        etag (str): The quoted ETag of the uncompressed representation.
+
+    Returns:
+        bool: True if the header is '*' or lists the ETag of any coding of the representation.
+    """
+    if header is None:
+        return False
+    etags = {etag, *[encoded_etag(etag, encoding) for encoding in ETAG_ENCODINGS]}
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return any(tag == '*' or tag in etags for tag in tags)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses data with the highest level of a content coding, for responses compressed once and sent many times.
+
+    Args:
+        data (bytes): The data to compress.
+        encoding (str): The content coding, 'br' or 'gzip'.
+
+    Returns:
+        bytes: The compressed data.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_all(data: bytes) -> dict[str, bytes]:
+    """
+    Compresses data with every supported content coding.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        dict[str, bytes]: The compressed data, by content coding.
+    """
+    return {encoding: compress(data, encoding) for encoding in ENCODINGS}
+
+
+class _CompressibleResponder(IdentityResponder):
+    """
+    Leaves the responses whose media type is not worth compressing untouched, and gives the ETag of
+    the compressed responses the content coding, see encoded_etag.
+
+    The responders extend those of Starlette's GZipMiddleware, which are not part of its public API,
+    so the version of Starlette is pinned in requirements.txt.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_with_etag(message: Message):
+            if message['type'] == 'http.response.start' and not self.content_encoding_set:
+                headers = MutableHeaders(raw=message['headers'])
+                if headers.get('content-encoding') == self.content_encoding and 'etag' in headers:
+                    headers['ETag'] = encoded_etag(headers['etag'], self.content_encoding)
+            await send(message)
+
+        await super().__call__(scope, receive, send_with_etag)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            content_type = Headers(raw=message['headers']).get('content-type', '')
+            await super().send_with_compression(message)
+            self.content_type_is_excluded = not content_type.startswith(COMPRESSIBLE_TYPES)
+            return
+        await super().send_with_compression(message)
+
+
+class _GZipResponder(_CompressibleResponder, GZipResponder):
+    pass
+
+
+class _BrotliResponder(_CompressibleResponder):
+    content_encoding = 'br'
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # each chunk is flushed, so streamed responses reach the client as they are produced
+        return self.compressor.process(body) + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses with brotli or gzip, as accepted by the client.
+
+    Only compressible media types are compressed, and streamed responses are compressed chunk by
+    chunk. Responses that already have a Content-Encoding, such as those compressed in advance,
+    are sent as they are. The ETag of a compressed response is made specific to its content coding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 5) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''))
+        responder: ASGIApp
+        if encoding == 'br':
+            responder = _BrotliResponder(self.app, self.minimum_size, quality=self.level)
+        elif encoding == 'gzip':
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=min(self.level, 9))
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,59 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+"""
+This module defines the configuration paths used by PyGenPres.
+"""
+home_dir = Path.home()
+config_dir = os.path.join(home_dir, '.config', 'pygenpres')
+if not os.path.exists(config_dir):
+    os.makedirs(config_dir)
+config_file = os.path.join(config_dir, 'config.json')
+if not os.path.exists(config_file):
+    with open(config_file, 'w') as f:
+        f.write('{}')
+presentations_dir = os.path.join(config_dir, 'presentations')
+if not os.path.exists(presentations_dir):
+    os.makedirs(presentations_dir)
+media_dir = os.path.join(config_dir, 'media')
+if not os.path.exists(media_dir):
+    os.makedirs(media_dir)
+
+with open(config_file, 'r') as f:
+    settings: dict = json.load(f)
+
+resources_dir = settings.get('resources_dir', os.path.join(Path(__file__).resolve().parents[2], 'res'))
+
+
+def get_setting(name: str, default: Any = None) -> Any:
+    """
+    Returns the value of a setting from the configuration file.
+
+    Args:
+        name (str): The name of the setting.
+        default (Any): The value to return if the setting is not defined.
+
+    Returns:
+        Any: The value of the setting.
+    """
+    return settings.get(name, default)
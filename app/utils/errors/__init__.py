@@ -30,3 +30,84 @@ class UnsupportedFileTypeError(Exception):
     def __init__(self, message="Unsupported file type", file_type: Any=None):
         self.message = f'{message} - Type: {file_type}'
         super().__init__(self.message)
+
+
+class MediaTooLargeError(Exception):
+    """
+    Custom exception class raised when an uploaded media file exceeds the configured size limit.
+
+    Attributes:
+        message (str): The error message, including the size limit.
+    """
+    def __init__(self, message="Media file too large", max_size: int = 0):
+        self.message = f'{message} - Limit: {max_size} bytes'
+        super().__init__(self.message)
+
+
+class EmptyMediaError(Exception):
+    """
+    Custom exception class raised when an uploaded media file has no content.
+
+    Attributes:
+        message (str): The error message.
+    """
+    def __init__(self, message="Empty media file"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class VersionConflictError(Exception):
+    """
+    Custom exception class raised when a presentation was changed by another writer since it was loaded.
+
+    Attributes:
+        message (str): The error message, including the stored version.
+        version (int): The stored version of the presentation.
+    """
+    def __init__(self, message="Presentation was modified concurrently", version: Any = None):
+        self.version = version
+        self.message = f'{message} - Version: {version}'
+        super().__init__(self.message)
+
+
+class RenderPoolBusyError(Exception):
+    """
+    Custom exception class raised when the render pool queue is full and a render cannot be accepted.
+
+    Attributes:
+        message (str): The error message, including the suggested delay.
+        retry_after (int): The number of seconds after which the client should try again.
+    """
+    def __init__(self, message="Too many renders in progress", retry_after: int = 1):
+        self.retry_after = retry_after
+        self.message = f'{message} - Retry after: {retry_after}s'
+        super().__init__(self.message)
+
+
+class RenderTimeoutError(Exception):
+    """
+    Custom exception class raised when a render does not complete within the configured time.
+
+    Attributes:
+        message (str): The error message, including the timeout.
+        timeout (float): The timeout, in seconds.
+    """
+    def __init__(self, message="Render timed out", timeout: float = 0):
+        self.timeout = timeout
+        self.message = f'{message} - Timeout: {timeout}s'
+        super().__init__(self.message)
+
+
+class StreamLagError(Exception):
+    """
+    Custom exception class raised when a request streaming a shared render stops reading for too long
+    while the render waits for it.
+
+    Attributes:
+        message (str): The error message, including the time waited.
+        timeout (float): The time waited for the request, in seconds.
+    """
+    def __init__(self, message="Stream stopped reading the render", timeout: float = 0):
+        self.timeout = timeout
+        self.message = f'{message} - Timeout: {timeout}s'
+        super().__init__(self.message)
@@ -16,34 +16,124 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import atexit
 import os
-from glob import glob
-from typing import Union, List
+import tempfile
+import threading
+import time
+from typing import Union
 
-from app.utils.errors import UnsupportedFileTypeError
+"""
+The permissions of the files created by the application, as set by the umask when it started.
+The umask is read once, as reading it means changing it for the whole process.
+"""
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
 
 
-def list_files(path: str, ext: Union[str, List[str]], recursive = True) -> List[str]:
+def fsync_dir(path: str):
     """
-    Lists files in a directory with the specified extension(s). Only files with extensions can be returned.
+    Flushes a directory entry to disk, making a rename or file creation in it durable.
 
     Args:
-       path (str): The directory path to search.
-       ext (str | List[str]): File extension(s) to filter.
-       recursive (bool, optional): Whether to search recursively. Defaults to True.
+        path (str): The directory path.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FsyncBatcher:
+    """
+    Groups the fsync calls of recently written files.
+
+    Paths added to the batcher are flushed to disk, together with their directories, by a
+    background thread at most `interval` seconds later, so a burst of writes costs a single
+    round of syncs. Pending paths are also flushed when the process exits.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._paths: set[str] = set()
+        self._condition = threading.Condition()
+        self._thread: Union[threading.Thread, None] = None
+        atexit.register(self.flush)
 
-    Returns:
-       List[str]: A list of file paths matching the extensions.
+    def add(self, path: str):
+        """
+        Schedules a file to be flushed to disk.
+
+        Args:
+            path (str): The file path.
+        """
+        with self._condition:
+            self._paths.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='fsync-batcher', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._paths:
+                    self._condition.wait()
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """
+        Flushes all the pending files and their directories to disk.
+        """
+        with self._condition:
+            paths, self._paths = self._paths, set()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in {os.path.dirname(path) for path in paths}:
+            fsync_dir(directory)
+
+
+def atomic_write(path: str, content: str, fsync: bool = True):
+    """
+    Writes a text file atomically.
+
+    The content is written to a temporary file in the same directory, which then replaces the
+    target with a rename, so readers see either the old or the new file, never a partial one. The
+    file keeps the permissions of the one it replaces, or gets the default ones of a new file.
+
+    Args:
+        path (str): The path of the file to write.
+        content (str): The content to write.
+        fsync (bool): Whether to flush the file and its directory to disk before returning.
     """
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"The given path '{path}' does not exist.")
-    if isinstance(ext, str):
-        if not ext.lstrip("."):
-            raise UnsupportedFileTypeError(f'Invalid extension', file_type=ext)
-        ext_set = {f'.{ext.lstrip(".")}'}
-    elif isinstance(ext, list):
-        ext_set = {f'.{e.lstrip(".")}' for e in ext if e.strip()}
-    else:
-        return []
-    files = glob(os.path.join(path, '**', '*.*'), recursive=recursive)
-    return [p for p in files if f'.{p.split('.')[-1]}' in ext_set]
+    directory = os.path.dirname(path)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            # mkstemp creates the file readable by its owner only
+            os.fchmod(f.fileno(), mode)
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync:
+        fsync_dir(directory)
@@ -0,0 +1,69 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import threading
+
+from markdown import Markdown
+
+from app.utils.cache import LRUCache
+from app.utils.config import get_setting
+
+"""
+This module renders the markdown fields of the slides.
+"""
+MARKDOWN_EXTENSIONS = ['tables', 'extra', 'fenced_code', 'codehilite', 'nl2br', 'sane_lists']
+
+"""
+Rendered markdown, keyed by the SHA-256 digest of the source.
+"""
+markdown_cache = LRUCache(max_size=int(get_setting('markdown_cache_size', 16 * 1024 * 1024)))
+
+_local = threading.local()
+
+
+def _converter() -> Markdown:
+    """
+    Returns the markdown converter of the current thread, creating it on first use.
+
+    Markdown instances are not thread-safe, so each thread gets its own, configured once with
+    the extensions and reset before each conversion.
+    """
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.converter = converter
+    return converter
+
+
+def render_markdown(text: str) -> str:
+    """
+    Converts markdown to HTML, through the markdown cache.
+
+    Args:
+        text (str): The markdown source.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    key = hashlib.sha256(text.encode()).hexdigest()
+    html = markdown_cache.get(key)
+    if html is None:
+        html = _converter().reset().convert(text)
+        markdown_cache.put(key, html, size=len(html))
+    return html
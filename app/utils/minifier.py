@@ -0,0 +1,267 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import re
+from typing import Iterator, Optional
+
+from app.utils.config import get_setting
+
+"""
+Matches the strings, the comments and the whitespace of CSS code.
+"""
+CSS_TOKENS = re.compile(r'''("[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')|(/\*.*?\*/)|(\s+)''', re.DOTALL)
+
+"""
+Matches the spaces around the CSS delimiters they can be removed from.
+"""
+CSS_SPACES = re.compile(r' ?([{};,]) ?')
+
+"""
+Matches the strings and the delimiters of the blocks and statements of CSS code.
+"""
+CSS_STRUCTURE = re.compile(r'''"[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*'|[{};]''')
+
+"""
+Matches the elements whose content is not HTML markup, to be left as is or minified as CSS or JavaScript.
+"""
+HTML_RAW_ELEMENTS = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+
+"""
+Matches the comments and the whitespace of HTML markup.
+"""
+HTML_TOKENS = re.compile(r'<!--(?!\[).*?-->|\s+', re.DOTALL)
+
+"""
+Matches the end of the JavaScript code a slash starts a regular expression literal after, rather than a division.
+"""
+JS_REGEX_PRECEDING = re.compile(r'(?:^|[(,=:\[!&|?{};+\-*%<>~^]|\breturn|\btypeof)\s*$')
+
+
+def _minify_css_code(code: str) -> str:
+    code = CSS_SPACES.sub(r'\1', code).replace(': ', ':')
+    return code.replace(';}', '}')
+
+
+def _css_blocks(css: str) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Splits minified CSS code into its top level statements.
+
+    Yields:
+        tuple[str, Optional[str]]: The prelude of each rule and the content of its block, or the
+            whole statement and None for statements without a block.
+    """
+    start, depth, block = 0, 0, 0
+    for match in CSS_STRUCTURE.finditer(css):
+        token, i = match[0], match.start()
+        if token == '{':
+            if depth == 0:
+                block = i
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                yield css[start:block], css[block + 1:i]
+                start = i + 1
+        elif token == ';' and depth == 0:
+            yield css[start:i + 1], None
+            start = i + 1
+    if css[start:].strip():
+        yield css[start:], None
+
+
+def _merge_rules(css: str) -> str:
+    """
+    Merges the adjacent rules with the same selector and drops the rules repeated later on.
+
+    Only the rules at the top level are merged, at-rules are left as they are. Both changes keep the
+    cascade: an earlier copy of a rule is overridden by the later one anyway.
+    """
+    rules: list[list[str]] = []
+    for prelude, body in _css_blocks(css):
+        if body is not None and not prelude.startswith('@') and rules and rules[-1][0] == prelude and rules[-1][1] is not None:
+            if body != rules[-1][1]:
+                rules[-1][1] = f'{rules[-1][1]};{body}' if rules[-1][1] and body else rules[-1][1] or body
+        else:
+            rules.append([prelude, body])
+    last = {}
+    for i, (prelude, body) in enumerate(rules):
+        if body is not None and not prelude.startswith('@'):
+            last[(prelude, body)] = i
+    return ''.join([
+        prelude if body is None else f'{prelude}{{{body}}}'
+        for i, (prelude, body) in enumerate(rules)
+        if body is None or prelude.startswith('@') or last[(prelude, body)] == i
+    ])
+
+
+def minify_css(css: str) -> str:
+    """
+    Minifies CSS code.
+
+    Comments and unneeded whitespace are removed, leaving strings untouched, then adjacent rules
+    with the same selector are merged and repeated rules are dropped.
+
+    Args:
+        css (str): The CSS code.
+
+    Returns:
+        str: The minified CSS code.
+    """
+    parts, code, position = [], [], 0
+    for match in CSS_TOKENS.finditer(css):
+        code.append(css[position:match.start()])
+        position = match.end()
+        if match[1]:
+            parts.append(_minify_css_code(''.join(code)))
+            parts.append(match[1])
+            code = []
+        elif match[3]:
+            code.append(' ')
+    code.append(css[position:])
+    parts.append(_minify_css_code(''.join(code)))
+    return _merge_rules(''.join(parts).strip())
+
+
+def _js_line_state(line: str, in_template: bool, in_comment: bool) -> tuple[bool, bool]:
+    """
+    Follows a line of JavaScript code, skipping its strings, regular expressions and line comment.
+
+    Args:
+        line (str): The line of code.
+        in_template (bool): Whether the line starts inside a template literal.
+        in_comment (bool): Whether the line starts inside a block comment.
+
+    Returns:
+        tuple[bool, bool]: Whether a template literal and whether a block comment are still open at
+            the end of the line.
+    """
+    position, quote = 0, None
+    while position < len(line):
+        char = line[position]
+        if in_comment:
+            end = line.find('*/', position)
+            if end < 0:
+                break
+            in_comment, position = False, end + 2
+            continue
+        if char == '\\':
+            position += 2
+            continue
+        if in_template or quote:
+            if char == ('`' if in_template else quote):
+                in_template, quote = False, None
+        elif char in '\'"':
+            quote = char
+        elif char == '`':
+            in_template = True
+        elif line.startswith('//', position):
+            break
+        elif line.startswith('/*', position):
+            in_comment = True
+            position += 1
+        elif char == '/' and JS_REGEX_PRECEDING.search(line[:position]):
+            in_class, position = False, position + 1
+            while position < len(line) and (in_class or line[position] != '/'):
+                if line[position] == '\\':
+                    position += 1
+                elif line[position] in '[]':
+                    in_class = line[position] == '['
+                position += 1
+        position += 1
+    return in_template, in_comment
+
+
+def minify_js(js: str) -> str:
+    """
+    Minifies JavaScript code, conservatively.
+
+    Only the indentation, the trailing whitespace, the blank lines and the lines holding nothing but
+    a comment are removed, so the code keeps its meaning whatever its syntax. Lines inside a
+    template literal spanning several lines are left untouched, and the lines inside a block comment
+    are kept whatever they start with.
+
+    Args:
+        js (str): The JavaScript code.
+
+    Returns:
+        str: The minified JavaScript code.
+    """
+    lines = []
+    in_template = in_comment = False
+    for line in js.splitlines():
+        starts_in_template, starts_in_comment = in_template, in_comment
+        in_template, in_comment = _js_line_state(line, in_template, in_comment)
+        if starts_in_template:
+            lines.append(line if in_template else line.rstrip())
+        else:
+            # the end of a line opening a template literal belongs to the string
+            stripped = line.lstrip() if in_template else line.strip()
+            # inside a block comment, a line starting with // may end the comment and hold code
+            if stripped and (starts_in_comment or not stripped.startswith('//')):
+                lines.append(stripped)
+    return '\n'.join(lines)
+
+
+def _minify_markup(html: str) -> str:
+    def replace(match: re.Match) -> str:
+        if match[0].startswith('<'):
+            return ''
+        return '\n' if '\n' in match[0] else ' '
+
+    return HTML_TOKENS.sub(replace, html)
+
+
+def minify_html(html: str) -> str:
+    """
+    Minifies HTML code.
+
+    Comments are removed and each run of whitespace is collapsed to a single space, or a single
+    line break, which the browser renders the same. The content of the pre and textarea elements is
+    left as is, and the content of the style and script elements is minified as CSS and JavaScript.
+
+    Args:
+        html (str): The HTML code.
+
+    Returns:
+        str: The minified HTML code.
+    """
+    parts, position = [], 0
+    for match in HTML_RAW_ELEMENTS.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        position = match.end()
+        opening, element, content, closing = match[1], match[2].lower(), match[3], match[4]
+        if element == 'style':
+            content = minify_css(content)
+        elif element == 'script':
+            content = minify_js(content)
+        parts.append(f'{_minify_markup(opening)}{content}{closing}')
+    parts.append(_minify_markup(html[position:]))
+    return ''.join(parts)
+
+
+def minify_enabled(endpoint: str) -> bool:
+    """
+    Tells whether the output of an endpoint is minified, according to the 'minify' setting.
+
+    Args:
+        endpoint (str): The name of the endpoint: 'presentation', 'export', 'slide' or 'bundles'.
+
+    Returns:
+        bool: True if the output of the endpoint is minified.
+    """
+    return endpoint in get_setting('minify', [])
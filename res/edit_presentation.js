@@ -25,6 +25,7 @@ import {
     w2sidebar,
     w2form,
     w2confirm,
+    w2alert,
     query
 } from 'https://rawgit.com/vitmalina/w2ui/master/dist/w2ui.es6.min.js';
 window.w2ui = w2ui;
@@ -32,6 +33,19 @@ window.w2utils = w2utils;
 const presId = '$presentation_id';
 const presTitle = '$presentation_title';
 const presFooter = '$presentation_footer';
+let presVersion = $presentation_version;
+let saveQueue = Promise.resolve();
+function ifMatch() {
+    return { 'If-Match': `"${presVersion}"` };
+};
+function checkVersion(resp) {
+    if (resp.status === 409 || resp.status === 412) {
+        w2alert('This presentation was modified elsewhere, it will be reloaded.')
+            .ok(() => window.location.reload());
+        throw new Error('Presentation was modified concurrently');
+    }
+    return resp.json();
+};
 const fontFamilies = [
     { id: 'Bebas Neue', text: 'Bebas Neue', style:"font-family: 'Bebas Neue';" },
     { id: 'Cookie', text: 'Cookie', style:"font-family: 'Cookie';" },
@@ -149,10 +163,10 @@ w2confirm('Are you sure?')
         const url = `/s/${presId}/${slideId}.json`;
         const options = {
             method: 'DELETE',
-            headers: {},
+            headers: ifMatch(),
         };
         fetch(url, options)
-            .then(resp => resp.json())
+            .then(checkVersion)
             .then(data => {
                 console.log('data', data);
                 window.location.reload();
@@ -216,15 +230,15 @@ let toolbar = new w2toolbar({
 function updatePresentation(data, callback) {
     console.log('updatePresentation', data);
     let url = '/save';
-    let options = w2utils.prepareParams(url, {
+    saveQueue = saveQueue.then(() => fetch(url, w2utils.prepareParams(url, {
         method: 'POST',
-        headers: {},
+        headers: ifMatch(),
         body: data,
-    }, 'JSON');
-    fetch(url, options)
-        .then(resp => resp.json())
+    }, 'JSON')))
+        .then(checkVersion)
         .then(json => {
             console.log('updatedPresentation', json);
+            presVersion = json.version;
             if (typeof callback === 'function') {
                 callback();
             }
@@ -238,13 +252,29 @@ function updatePresentation(data, callback) {
             w2utils.unlock('body');
         });
 };
+async function uploadMedia(entry) {
+    if (typeof entry.hash === 'string' && entry.hash.length > 0) {
+        return { type: entry.type, name: entry.name, size: entry.size, hash: entry.hash };
+    }
+    const url = `/media?name=${encodeURIComponent(entry.name)}`;
+    const resp = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': entry.type || 'application/octet-stream' },
+        body: entry.file,
+    });
+    const json = await resp.json();
+    if (!resp.ok) {
+        throw new Error(json.message);
+    }
+    return json;
+};
 toolbar.on('click', event => {
     console.log('Toolbar click', event);
     if (event.target === 'home') {
         window.location.replace(`/`);
     }
     else if (event.target === 'menu:dl-html') {
-        fetch(`/p/${presId}.html`)
+        fetch(`/p/${presId}.html?export=true`)
             .then(response => response.blob())
             .then(blob => {
                 let url = URL.createObjectURL(blob);
@@ -293,42 +323,32 @@ let slideForm = new w2form({
     style: 'width: 100%;height: 100%; overflow: hidden auto;padding: 5px;',
     record: {},
     fields: [],
-    onChange(event) {
+    async onChange(event) {
         console.log('onChange', event.detail);
-        w2utils.lock('body', 'Saving...', true);
+        w2utils.lock('body', 'Uploading...', true);
         const slideId = this.record.id;
         const field = event.detail.field;
-        let image_data = null;
-        if (!field.startsWith('fx_') && field.endsWith('image') && event.detail.value.current.length > 0) {
-            let entry = event.detail.value.current.at(0);
-            image_data = {
-                type: entry.type,
-                name: entry.name,
-                content: entry.content,
-                size: entry.size
-            };
-        }
-        let video_data = null;
-        if (!field.startsWith('fx_') && field.endsWith('video') && event.detail.value.current.length > 0) {
-            let entry = event.detail.value.current.at(0);
-            video_data = {
-                type: entry.type,
-                name: entry.name,
-                content: entry.content,
-                size: entry.size
-            };
+        let media_data = null;
+        if (!field.startsWith('fx_') && (field.endsWith('image') || field.endsWith('video')) && event.detail.value.current.length > 0) {
+            try {
+                media_data = await uploadMedia(event.detail.value.current.at(0));
+            } catch (error) {
+                console.error(error);
+                w2utils.unlock('body');
+                return;
+            }
         }
+        w2utils.lock('body', 'Saving...', true);
         let fx_value = null;
         if (field.startsWith('fx_') && event.detail.value.current.length > 0) {
             console.info('fx item', this.get(field).w2field.selected);
             fx_value = this.get(field).w2field.selected.id;
         };
         const value = field.endsWith('color') ?
-            `#${event.detail.value.current}` : !field.startsWith('fx_') && field.endsWith('image') ?
-                image_data : !field.startsWith('fx_') && field.endsWith('video') ?
-                    video_data : field == 'theme' ?
-                        event.detail.value.current.toLowerCase().replaceAll(' ', '_') : field.startsWith('fx_') ?
-                            fx_value : event.detail.value.current;
+            `#${event.detail.value.current}` : !field.startsWith('fx_') && (field.endsWith('image') || field.endsWith('video')) ?
+                media_data : field == 'theme' ?
+                    event.detail.value.current.toLowerCase().replaceAll(' ', '_') : field.startsWith('fx_') ?
+                        fx_value : event.detail.value.current;
         const data = {
             id: presId,
             changes: [
@@ -638,14 +658,14 @@ let leftSidebar = new w2sidebar({
         if (event.target === 'plus') {
             console.info('Add slide');
             const url = `/s/${presId}/add`;
-            const options = {
+            saveQueue = saveQueue.then(() => fetch(url, {
                 method: 'GET',
-                headers: {},
-            };
-            fetch(url, options)
-                .then(resp => resp.json())
+                headers: ifMatch(),
+            }))
+                .then(checkVersion)
                 .then(data => {
                     console.log('data', data);
+                    presVersion = data.version;
                     const slide = data.slides[data.slides.length - 1];
                     slides.length = 0;
                     data.slides.forEach(s => {
@@ -660,7 +680,8 @@ let leftSidebar = new w2sidebar({
                     renderSlideForm(slide);
                     w2ui.left.nodes = sbNodes;
                     w2ui.left.refresh();
-                });
+                })
+                .catch(error => console.error(error));
             return;
         }
         loadSlide(event.target);
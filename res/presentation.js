@@ -61,7 +61,7 @@ document.addEventListener("animationend", (event) => {
 });
 document.scrollToSlide = scrollToSlide;
 document.addEventListener('DOMContentLoaded', function() {
-    const total_pages = $total_pages_count;
+    const total_pages = document.totalPagesCount;
     document.querySelector('#total-pages').innerHTML = total_pages;
 
     document.addEventListener('keyup', function(e) {
@@ -142,5 +142,3 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     showSlide();
 });
-$scripts
-$slides_scripts
@@ -0,0 +1,12 @@
+const videos = Object.fromEntries(
+    Object.entries(videoParts).map(([digest, parts]) => [digest, parts.join('')])
+);
+document.querySelectorAll('[data-media]').forEach(element => {
+    const digest = element.dataset.media;
+    if (digest in videos) {
+        element.src = videos[digest];
+        return;
+    }
+    const image = getComputedStyle(document.documentElement).getPropertyValue('--media-' + digest);
+    element.src = image.trim().replace(/^url\(["']?/, '').replace(/["']?\)$/, '');
+});
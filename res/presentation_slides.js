@@ -0,0 +1,3 @@
+document.totalPagesCount = $total_pages_count;
+$scripts
+$slides_scripts
@@ -0,0 +1,55 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+
+from app.utils.compression import ENCODINGS, encoded_etag, etag_matches, negotiate
+
+ETAG = '"0123456789abcdef"'
+
+
+def test_encoded_etag():
+    assert encoded_etag(ETAG, 'br') == '"0123456789abcdef-br"'
+    assert encoded_etag(ETAG, None) == ETAG
+
+
+@pytest.mark.parametrize('header, matches', [
+    (None, False),
+    ('', False),
+    (ETAG, True),
+    (f'W/{ETAG}', True),
+    ('"0123456789abcdef-gzip"', True),
+    ('"0123456789abcdef-br", "other"', True),
+    ('"other", ' + ETAG, True),
+    ('*', True),
+    ('"0123456789"', False),
+    ('"0123456789abcdef0"', False),
+    ('0123456789abcdef', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, ETAG) is matches
+
+
+@pytest.mark.parametrize('accept_encoding, encoding', [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0, identity', None),
+    ('deflate, *;q=0.5', ENCODINGS[0]),
+])
+def test_negotiate(accept_encoding, encoding):
+    assert negotiate(accept_encoding) == encoding
@@ -0,0 +1,90 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import os
+
+import pytest
+
+from app.domain.model.presentation import Presentation
+from app.features.storage.file_store import FilePresentationStore
+
+
+def _change_title(presentation: Presentation, title: str) -> list[dict]:
+    changes = [{'field': 'title', 'value': title}]
+    presentation.apply_changes(changes)
+    presentation.version += 1
+    return changes
+
+
+@pytest.fixture
+def store(tmp_path) -> FilePresentationStore:
+    presentations_dir = tmp_path / 'presentations'
+    presentations_dir.mkdir()
+    return FilePresentationStore(str(presentations_dir))
+
+
+def test_journal_is_replayed(store):
+    presentation = Presentation(title='Initial')
+    asyncio.run(store.save(presentation))
+    asyncio.run(store.save_changes(presentation, _change_title(presentation, 'Journaled')))
+
+    loaded = asyncio.run(store.load(presentation.id))
+
+    assert loaded.title == 'Journaled'
+    assert loaded.version == presentation.version
+
+
+def test_truncated_journal_entry_is_dropped_before_the_next_entry(store):
+    presentation = Presentation(title='Initial')
+    asyncio.run(store.save(presentation))
+    asyncio.run(store.save_changes(presentation, _change_title(presentation, 'First')))
+    journal_path = store._journal_path(presentation.id)
+    with open(journal_path, 'rb+') as journal:
+        journal.truncate(journal.seek(0, 2) - 10)
+
+    asyncio.run(store.save_changes(presentation, _change_title(presentation, 'Second')))
+    loaded = asyncio.run(store.load(presentation.id))
+
+    assert loaded.title == 'Second'
+    with open(journal_path) as journal:
+        assert journal.read().endswith('\n')
+
+
+def test_truncated_journal_does_not_break_snapshots(store):
+    presentation = Presentation(title='Initial')
+    asyncio.run(store.save(presentation))
+    asyncio.run(store.save_changes(presentation, _change_title(presentation, 'First')))
+    with open(store._journal_path(presentation.id), 'a') as journal:
+        journal.write('{"version": 99, "chan')
+
+    _change_title(presentation, 'Snapshot')
+    asyncio.run(store.save(presentation))
+    loaded = asyncio.run(store.load(presentation.id))
+
+    assert loaded.title == 'Snapshot'
+    assert loaded.version == presentation.version
+
+
+def test_index_is_rebuilt_with_the_journaled_title(store):
+    presentation = Presentation(title='Initial')
+    asyncio.run(store.save(presentation))
+    asyncio.run(store.save_changes(presentation, _change_title(presentation, 'Journaled')))
+    os.remove(store.index.index_file)
+    store.index._entries = None
+    assert [entry['title'] for entry in asyncio.run(store.list_presentations())] == ['Journaled']
@@ -0,0 +1,39 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import stat
+
+from app.utils.files import FILE_MODE, atomic_write
+
+
+def test_atomic_write_creates_files_with_the_default_mode(tmp_path):
+    path = str(tmp_path / 'new.json')
+    atomic_write(path, '{}', fsync=False)
+    assert stat.S_IMODE(os.stat(path).st_mode) == FILE_MODE
+
+
+def test_atomic_write_keeps_the_mode_of_the_replaced_file(tmp_path):
+    path = str(tmp_path / 'shared.json')
+    with open(path, 'w') as f:
+        f.write('{}')
+    os.chmod(path, 0o640)
+    atomic_write(path, '{"title": ""}', fsync=False)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    with open(path) as f:
+        assert f.read() == '{"title": ""}'
@@ -0,0 +1,84 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import os
+
+import pytest
+
+from app.features.media import MediaStore
+from app.utils.errors import EmptyMediaError
+
+
+def _ftyp(major: bytes, *compatible: bytes) -> bytes:
+    brands = major + b'\x00\x00\x00\x00' + b''.join(compatible)
+    return (8 + len(brands)).to_bytes(4, 'big') + b'ftyp' + brands + b'\x00\x00\x00\x08mdat'
+
+
+@pytest.mark.parametrize('head, media_type', [
+    (b'\x89PNG\r\n\x1a\n\x00\x00', 'image/png'),
+    (b'\xff\xd8\xff\xe0\x00\x10JFIF', 'image/jpeg'),
+    (b'GIF89a\x01\x00', 'image/gif'),
+    (b'RIFF\x24\x00\x00\x00WEBPVP8 ', 'image/webp'),
+    (b'BM\x36\x00\x0c\x00\x00\x00\x00\x00\x36\x00', 'image/bmp'),
+    (b'II*\x00\x08\x00\x00\x00', 'image/tiff'),
+    (b'MM\x00*\x00\x00\x00\x08', 'image/tiff'),
+    (_ftyp(b'avif', b'mif1', b'miaf'), 'image/avif'),
+    (_ftyp(b'mif1', b'mif1', b'avif'), 'image/avif'),
+    (_ftyp(b'heic', b'mif1', b'heic'), 'image/heic'),
+    (_ftyp(b'mif1', b'mif1', b'heic'), 'image/heic'),
+    (_ftyp(b'msf1', b'msf1'), 'image/heif'),
+    (_ftyp(b'isom', b'isom', b'iso2', b'mp41'), 'video/mp4'),
+    (b'\x1a\x45\xdf\xa3\x9f\x42\x86\x81', 'video/webm'),
+    (b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"/>', 'image/svg+xml'),
+    (b'%PDF-1.7', None),
+    (b'BM is not a bitmap', None),
+    (b'<html><script>alert(1)</script>', None),
+])
+def test_guess_type(head, media_type):
+    assert MediaStore.guess_type(head) == media_type
+
+
+def test_guess_type_keeps_the_declared_video_type():
+    head = _ftyp(b'qt  ', b'qt  ')
+    assert MediaStore.guess_type(head, declared='video/quicktime') == 'video/quicktime'
+    assert MediaStore.guess_type(head, declared='text/html') == 'video/mp4'
+
+
+def test_guess_type_does_not_trust_an_image_brand_declared_as_video():
+    assert MediaStore.guess_type(_ftyp(b'avif', b'mif1'), declared='video/mp4') == 'image/avif'
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_empty_upload_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaStore, 'media_path', str(tmp_path))
+    with pytest.raises(EmptyMediaError):
+        asyncio.run(MediaStore.put_stream(_chunks(b'', b'')))
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_is_stored_under_its_digest(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaStore, 'media_path', str(tmp_path))
+    data = b'GIF89a' + b'\x00' * 32
+    digest, size, media_type = asyncio.run(MediaStore.put_stream(_chunks(data[:10], data[10:])))
+    assert (size, media_type) == (len(data), 'image/gif')
+    assert MediaStore.read(digest) == data
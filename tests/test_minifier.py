@@ -0,0 +1,51 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+
+from app.utils.minifier import minify_css, minify_html, minify_js
+
+
+@pytest.mark.parametrize('css, minified', [
+    ('a {\n    color: red;\n}\n', 'a{color:red}'),
+    ('/* comment */\nb { margin: 0 auto; }', 'b{margin:0 auto}'),
+    ('a { content: "  /* kept */  "; }', 'a{content:"  /* kept */  "}'),
+    ('a { color: red; }\na { margin: 0; }', 'a{color:red;margin:0}'),
+    ('a { color: red; }\nb { color: blue; }\na { color: red; }', 'b{color:blue}a{color:red}'),
+    ('@media (max-width: 600px) {\n    a { color: red; }\n}', '@media (max-width:600px){a{color:red}}'),
+])
+def test_minify_css(css, minified):
+    assert minify_css(css) == minified
+
+
+@pytest.mark.parametrize('js, minified', [
+    ('function f() {\n    return 1;\n}\n\n', 'function f() {\nreturn 1;\n}'),
+    ('// comment\nlet a = 1; // trailing\n', 'let a = 1; // trailing'),
+    ('const s = `\n    kept\n  `;\n', 'const s = `\n    kept\n  `;'),
+    ('/*\n// inside\n*/ let a = 1;\n', '/*\n// inside\n*/ let a = 1;'),
+    ('const url = "http://example.com";\n', 'const url = "http://example.com";'),
+    ('const re = /\\/\\//g;\n    // comment\n', 'const re = /\\/\\//g;'),
+])
+def test_minify_js(js, minified):
+    assert minify_js(js) == minified
+
+
+def test_minify_html_keeps_raw_elements():
+    html = '<div>\n    <!-- comment -->\n    <pre>  a\n  b</pre>\n</div>\n<style>\na { color: red; }\n</style>'
+    # the blank line left by the comment is removed with the others by the render pipeline
+    assert minify_html(html) == '<div>\n\n<pre>  a\n  b</pre>\n</div>\n<style>a{color:red}</style>'
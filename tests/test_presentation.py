@@ -0,0 +1,72 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import base64
+import json
+
+from app.domain.api.store_presentation import store_presentation
+from app.domain.model.file import Image
+from app.domain.model.presentation import Presentation
+from app.domain.model.slides import Slide
+from app.domain.model.templates.templates import Templates
+from app.domain.model.transitions.transitions import Transitions
+from app.features.media import MediaStore
+from app.features.storage.file_store import FilePresentationStore
+
+PNG = base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'\x00' * 32).decode()
+
+
+def _presentation() -> Presentation:
+    presentation = Presentation(title='Slides')
+    slide = Slide(template=Templates.VIDEO.new_instance(), transition=Transitions.default(), position=0)
+    presentation.add_slide(slide, position=0)
+    return presentation
+
+
+def test_apply_changes_leaves_the_changes_untouched():
+    presentation = _presentation()
+    slide = presentation.slides[0]
+    changes = [{'field': 'slide', 'id': slide.id, 'value': [
+        {'field': 'transition', 'value': {'id': Transitions.FADEOUT.value}},
+    ]}]
+    sent = json.dumps(changes)
+    applied = presentation.apply_changes(changes)
+    assert json.dumps(changes) == sent
+    assert applied[0]['value'][0]['value']['instance_id'] == presentation.slides[0].transition.id
+
+
+def test_stored_changes_reference_the_media_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaStore, 'media_path', str(tmp_path / 'media'))
+    (tmp_path / 'media').mkdir()
+    presentations_dir = tmp_path / 'presentations'
+    presentations_dir.mkdir()
+    store = FilePresentationStore(str(presentations_dir))
+    presentation = _presentation()
+    asyncio.run(store_presentation(presentation, store))
+    changes = [{'field': 'slide', 'id': presentation.slides[0].id, 'value': [
+        {'field': 'background_image', 'value': {'type': 'image/png', 'name': 'bg.png', 'content': PNG}},
+    ]}]
+    assert asyncio.run(store_presentation(presentation, store, presentation.apply_changes(changes)))
+
+    image = presentation.slides[0].background_image
+    assert isinstance(image, Image) and image.hash and not image.content
+    with open(store._journal_path(presentation.id)) as journal:
+        recorded = json.loads(journal.readline())['changes'][0]['value'][0]['value']
+    assert (recorded['hash'], recorded['content']) == (image.hash, '')
+    assert asyncio.run(store.load(presentation.id)).slides[0].background_image.hash == image.hash
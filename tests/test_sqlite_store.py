@@ -0,0 +1,44 @@
+"""
+    PyGenPres - A Python Presentation Generator
+
+    Copyright (C) 2025  Cyril BOSSELUT
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+
+from app.domain.model.presentation import Presentation
+from app.features.storage.file_store import FilePresentationStore
+from app.features.storage.sqlite_store import SQLitePresentationStore
+
+
+def test_file_presentations_are_imported_once(tmp_path):
+    presentations_dir = tmp_path / 'presentations'
+    presentations_dir.mkdir()
+    files = FilePresentationStore(str(presentations_dir))
+    presentation = Presentation(title='Initial')
+    asyncio.run(files.save(presentation))
+    changes = [{'field': 'title', 'value': 'Journaled'}]
+    presentation.apply_changes(changes)
+    presentation.version += 1
+    asyncio.run(files.save_changes(presentation, changes))
+
+    db_path = str(tmp_path / 'presentations.sqlite3')
+    store = SQLitePresentationStore(db_path, import_dir=str(presentations_dir))
+    assert [entry['title'] for entry in asyncio.run(store.list_presentations())] == ['Journaled']
+    assert asyncio.run(store.load(presentation.id)).version == presentation.version
+
+    asyncio.run(store.delete(presentation.id))
+    store = SQLitePresentationStore(db_path, import_dir=str(presentations_dir))
+    assert asyncio.run(store.list_presentations()) == []